@@ -1,8 +1,16 @@
-"""Google Calendar OAuth credential handling."""
+"""Google Calendar OAuth credential handling.
+
+``get_credentials`` does the one-off load/refresh/OAuth dance against
+``token.pickle``. ``credential_manager`` keeps the result in memory for the
+life of the process, refreshes it shortly before expiry and only writes the
+token file when the refresh actually changed it.
+"""
 
 from __future__ import annotations
 
 import pickle
+import threading
+from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
 
 from google.auth.transport.requests import Request
@@ -59,3 +67,48 @@ def _persist(creds: Credentials, path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("wb") as fh:
         pickle.dump(creds, fh)
+
+
+class CredentialManager:
+    """Thread-safe, process-wide holder of the Google credentials."""
+
+    def __init__(self, refresh_margin: timedelta = timedelta(minutes=5)) -> None:
+        self._refresh_margin = refresh_margin
+        self._creds: Credentials | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Credentials:
+        """Return valid credentials, refreshing them ahead of expiry."""
+        with self._lock:
+            if self._creds is None:
+                self._creds = get_credentials()
+            elif self._expires_soon(self._creds):
+                self._refresh(self._creds)
+            return self._creds
+
+    def invalidate(self) -> None:
+        """Forget the in-memory credentials (e.g. after a revoked token)."""
+        with self._lock:
+            self._creds = None
+
+    def _expires_soon(self, creds: Credentials) -> bool:
+        if not creds.valid:
+            return True
+        if creds.expiry is None:
+            return False
+        # google-auth stores ``expiry`` as naive UTC.
+        expiry = creds.expiry.replace(tzinfo=UTC)
+        return expiry - datetime.now(UTC) < self._refresh_margin
+
+    def _refresh(self, creds: Credentials) -> None:
+        if not creds.refresh_token:
+            self._creds = get_credentials()
+            return
+        old_token = creds.token
+        creds.refresh(Request())
+        if creds.token != old_token:
+            _persist(creds, settings.calendar_token_path)
+        logger.debug("Google credentials refreshed ahead of expiry")
+
+
+credential_manager = CredentialManager()
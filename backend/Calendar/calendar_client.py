@@ -0,0 +1,48 @@
+"""Long-lived Google Calendar API client.
+
+Building the discovery client and its authorized transport is expensive, so
+it happens once per worker thread instead of once per calendar and refresh.
+``httplib2`` connections are not thread-safe; every thread therefore keeps its
+own ``AuthorizedHttp`` (with keep-alive) while all of them share the
+credentials from ``credential_manager``.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+
+from Calendar.calendar_auth import CredentialManager, credential_manager
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+_HTTP_TIMEOUT = 30
+
+
+class CalendarClient:
+    """Hands out a cached, authorized ``calendar`` v3 service per thread."""
+
+    def __init__(self, credentials: CredentialManager, timeout: int = _HTTP_TIMEOUT) -> None:
+        self._credentials = credentials
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def service(self) -> Any:
+        creds = self._credentials.get()
+        local = self._local
+        if getattr(local, "creds", None) is not creds:
+            local.service = self._build(creds)
+            local.creds = creds
+        return local.service
+
+    def _build(self, creds: Credentials) -> Any:
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=self._timeout))
+        return build("calendar", "v3", http=http, cache_discovery=False)
+
+
+calendar_client = CalendarClient(credential_manager)
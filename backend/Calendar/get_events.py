@@ -1,15 +1,28 @@
-"""Google Calendar event aggregation."""
+"""Google Calendar event aggregation.
+
+* Calendars are fetched concurrently on a small module-level pool, bounded by
+  ``calendar_fetch_concurrency``.
+* The whole refresh has a deadline (``calendar_refresh_deadline``). A calendar
+  that misses it, or fails, contributes its last good result; its fetch keeps
+  running in the background and is reused (not resubmitted) by the next
+  refresh.
+* Each calendar is mirrored locally in an ``EventStore`` that is kept current
+  with the Calendar API's incremental sync (``syncToken``). Quiet calendars
+  cost one tiny request per refresh; a full resync happens on ``410 Gone``
+  and every ``calendar_full_resync_hours`` (which also rolls the sync window).
+"""
 
 from __future__ import annotations
 
 import json
+import threading
 from collections import defaultdict
-from datetime import UTC, datetime
-from typing import TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any
 from zoneinfo import ZoneInfo
 
-from google.auth.exceptions import TransportError
-from googleapiclient.discovery import build
+from google.auth.exceptions import RefreshError, TransportError
 from googleapiclient.errors import HttpError
 from tenacity import (
     retry,
@@ -18,9 +31,11 @@ from tenacity import (
     wait_exponential,
 )
 
-from Calendar.calendar_auth import get_credentials
+from Calendar.calendar_auth import credential_manager
+from Calendar.calendar_client import calendar_client
 from config import settings
 from logging_config import get_logger
+from metrics import retry_hook
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -29,6 +44,12 @@ logger = get_logger(__name__)
 
 LOCAL_TZ = ZoneInfo(settings.timezone)
 
+_executor = ThreadPoolExecutor(max_workers=settings.calendar_fetch_concurrency, thread_name_prefix="calendar")
+_state_lock = threading.Lock()
+_in_flight: dict[str, Future] = {}
+_last_good: dict[str, list[dict]] = {}
+_stores: dict[str, EventStore] = {}
+
 
 def load_calendar_ids(json_path: Path | None = None) -> list[dict]:
     path = json_path or settings.calendar_config_path
@@ -42,6 +63,7 @@ def load_calendar_ids(json_path: Path | None = None) -> list[dict]:
     retry=retry_if_exception_type((TransportError, HttpError, ConnectionError)),
     wait=wait_exponential(multiplier=1, min=5, max=60),
     stop=stop_after_attempt(5),
+    before_sleep=retry_hook("google"),
     reraise=True,
 )
 def get_upcoming_events(calendar_id: str, n: int = 10) -> list[dict]:
@@ -49,44 +71,108 @@ def get_upcoming_events(calendar_id: str, n: int = 10) -> list[dict]:
     if not calendar_id:
         raise ValueError("Calendar ID required")
 
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds, cache_discovery=False)
-    now_utc = datetime.now(UTC).isoformat().replace("+00:00", "Z")
-
-    result = (
-        service.events()
-        .list(
-            calendarId=calendar_id,
-            timeMin=now_utc,
-            maxResults=n,
-            singleEvents=True,
-            orderBy="startTime",
-        )
-        .execute()
-    )
-
-    events: list[dict] = []
-    for e in result.get("items", []):
-        start_raw = e["start"].get("dateTime", e["start"].get("date"))
-        end_raw = e["end"].get("dateTime", e["end"].get("date"))
-        is_all_day = "date" in e["start"]
-
-        if is_all_day:
-            start_dt = datetime.strptime(start_raw, "%Y-%m-%d")
-            end_dt = datetime.strptime(end_raw, "%Y-%m-%d")
-        else:
-            start_dt = _to_local_naive(start_raw)
-            end_dt = _to_local_naive(end_raw)
+    with _state_lock:
+        store = _stores.setdefault(calendar_id, EventStore(calendar_id))
+    try:
+        store.sync(calendar_client.service())
+    except (HttpError, RefreshError) as e:
+        if isinstance(e, RefreshError) or e.resp.status == 401:
+            # Revoked/expired token: reload it from disk on the next attempt.
+            logger.warning("Calendar '%s': credentials rejected, reloading: %s", calendar_id, e)
+            credential_manager.invalidate()
+        raise
+    return store.upcoming(n)
 
-        events.append(
-            {
-                "start": start_dt,
-                "end": end_dt,
-                "title": e.get("summary", "Kein Titel"),
-                "all_day": is_all_day,
-            }
+
+def _parse_event(e: dict) -> dict:
+    start_raw = e["start"].get("dateTime", e["start"].get("date"))
+    end_raw = e["end"].get("dateTime", e["end"].get("date"))
+    is_all_day = "date" in e["start"]
+
+    if is_all_day:
+        start_dt = datetime.strptime(start_raw, "%Y-%m-%d")
+        end_dt = datetime.strptime(end_raw, "%Y-%m-%d")
+    else:
+        start_dt = _to_local_naive(start_raw)
+        end_dt = _to_local_naive(end_raw)
+
+    return {
+        "start": start_dt,
+        "end": end_dt,
+        "title": e.get("summary", "Kein Titel"),
+        "all_day": is_all_day,
+    }
+
+
+class EventStore:
+    """Local mirror of one calendar, kept current via incremental sync."""
+
+    def __init__(self, calendar_id: str) -> None:
+        self.calendar_id = calendar_id
+        self.sync_token: str | None = None
+        self.events: dict[str, dict] = {}
+        self.synced_at: datetime | None = None
+        self._lock = threading.Lock()
+
+    def sync(self, service: Any) -> None:
+        """Bring the mirror up to date (incremental when possible)."""
+        with self._lock:
+            resync_after = timedelta(hours=settings.calendar_full_resync_hours)
+            due = self.synced_at is None or datetime.now(UTC) - self.synced_at > resync_after
+            if self.sync_token and not due:
+                try:
+                    self._incremental_sync(service)
+                    return
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    logger.info("Calendar '%s': sync token expired, full resync", self.calendar_id)
+            self._full_sync(service)
+
+    def _full_sync(self, service: Any) -> None:
+        now = datetime.now(UTC)
+        window_end = now + timedelta(days=settings.calendar_sync_window_days)
+        events: dict[str, dict] = {}
+        token = self._paginate(
+            service,
+            events,
+            timeMin=now.isoformat().replace("+00:00", "Z"),
+            timeMax=window_end.isoformat().replace("+00:00", "Z"),
         )
-    return events
+        self.events = events
+        self.sync_token = token
+        self.synced_at = now
+
+    def _incremental_sync(self, service: Any) -> None:
+        # Changes are upserts/deletes keyed by event id, so replaying a
+        # partially applied page set after an error is harmless.
+        self.sync_token = self._paginate(service, self.events, syncToken=self.sync_token)
+
+    def _paginate(self, service: Any, events: dict[str, dict], **query: Any) -> str | None:
+        page_token: str | None = None
+        while True:
+            result = (
+                service.events()
+                .list(calendarId=self.calendar_id, singleEvents=True, maxResults=250, pageToken=page_token, **query)
+                .execute()
+            )
+            for item in result.get("items", []):
+                if item.get("status") == "cancelled":
+                    events.pop(item["id"], None)
+                else:
+                    events[item["id"]] = _parse_event(item)
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return result.get("nextSyncToken")
+
+    def upcoming(self, n: int) -> list[dict]:
+        """The next ``n`` events that have not ended yet; ended ones are pruned."""
+        now = datetime.now(LOCAL_TZ).replace(tzinfo=None)
+        with self._lock:
+            for event_id in [i for i, ev in self.events.items() if ev["end"] <= now]:
+                del self.events[event_id]
+            events = sorted(self.events.values(), key=lambda ev: ev["start"])
+        return events[:n]
 
 
 def _to_local_naive(iso_str: str) -> datetime:
@@ -96,27 +182,62 @@ def _to_local_naive(iso_str: str) -> datetime:
     return dt
 
 
-def get_all_events(max_total: int = 10) -> dict[str, list[dict]]:
+def _fetch_calendar(calendar_id: str) -> list[dict]:
+    events = get_upcoming_events(calendar_id, n=50)
+    with _state_lock:
+        _last_good[calendar_id] = events
+    return events
+
+
+def _submit(calendar_id: str) -> Future:
+    """Start a fetch for ``calendar_id`` unless one is still running."""
+    with _state_lock:
+        future = _in_flight.get(calendar_id)
+        if future is None or future.done():
+            future = _executor.submit(_fetch_calendar, calendar_id)
+            _in_flight[calendar_id] = future
+        return future
+
+
+def get_all_events(max_total: int = 10, deadline: float | None = None) -> dict[str, list[dict]]:
     """Aggregate events from all configured calendars, grouped by ISO date.
 
-    On failure this raises; the CacheService keeps the previous good payload,
-    so no separate in-module fallback cache is needed.
+    Calendars are fetched in parallel; after ``deadline`` seconds (default:
+    ``settings.calendar_refresh_deadline``) stragglers and failed calendars
+    fall back to their last good result, or are skipped if they never had one.
     """
-    calendars = load_calendar_ids()
-    raw_events: list[dict] = []
+    calendars = []
+    for cal in load_calendar_ids():
+        if cal.get("id"):
+            calendars.append(cal)
+        else:
+            logger.warning("Calendar '%s' has no id in calendars.json; skipped", cal.get("name", "?"))
+    timeout = settings.calendar_refresh_deadline if deadline is None else deadline
+    futures = [(cal, _submit(cal["id"])) for cal in calendars]
+    wait([f for _, f in futures], timeout=timeout)
 
-    for cal in calendars:
+    raw_events: list[dict] = []
+    for cal, future in futures:
         cal_name = cal.get("name", "?")
-        cal_id = cal.get("id")
-        try:
-            events = get_upcoming_events(cal_id, n=50)
-        except Exception as e:
-            logger.warning("Calendar '%s' fetch failed: %s", cal_name, e)
-            continue
+        if future.done() and future.exception() is None:
+            events = future.result()
+        else:
+            reason = future.exception() if future.done() else f"missed {timeout}s deadline"
+            with _state_lock:
+                events = _last_good.get(cal["id"])
+            if events is None:
+                logger.warning("Calendar '%s' fetch failed: %s", cal_name, reason)
+                continue
+            logger.warning("Calendar '%s' fetch failed (%s); using last good result", cal_name, reason)
         for ev in events:
             raw_events.append({**ev, "calendar": cal_name})
 
-    raw_events.sort(key=lambda e: e["start"])
+    return group_events(raw_events, max_total)
+
+
+def group_events(raw_events: list[dict], max_total: int = 10) -> dict[str, list[dict]]:
+    """Sort, limit (keeping the last day complete) and group events by ISO date."""
+    raw_events = sorted(raw_events, key=lambda e: e["start"])
 
     if len(raw_events) <= max_total:
         limited = raw_events
@@ -0,0 +1,117 @@
+"""FritzBox call monitor client (TCP port 1012).
+
+* Enable on the box once by dialling ``#96*5*``.
+* The box pushes one ``;``-separated line per event::
+
+      18.10.26 12:00:01;RING;0;01701234567;089123456;SIP0;
+      18.10.26 12:00:05;CONNECT;0;10;01701234567;
+      18.10.26 12:01:30;DISCONNECT;0;85;
+
+* ``CallMonitor`` runs on a daemon thread, hands each event to ``on_event``
+  and reconnects with exponential backoff when the connection drops.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from logging_config import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = get_logger(__name__)
+
+EVENTS = ("RING", "CALL", "CONNECT", "DISCONNECT")
+
+
+@dataclass(slots=True, frozen=True)
+class CallEvent:
+    timestamp: str
+    kind: str
+    connection_id: str
+    fields: tuple[str, ...]
+
+
+def parse_line(line: str) -> CallEvent | None:
+    """Parse one call monitor line; ``None`` for anything unrecognised."""
+    parts = line.strip().rstrip(";").split(";")
+    if len(parts) < 3 or parts[1] not in EVENTS:
+        return None
+    return CallEvent(timestamp=parts[0], kind=parts[1], connection_id=parts[2], fields=tuple(parts[3:]))
+
+
+class CallMonitor:
+    """Listen to the call monitor stream and reconnect when it drops."""
+
+    def __init__(
+        self,
+        host: str,
+        on_event: Callable[[CallEvent], None],
+        port: int = 1012,
+        reconnect_min: float = 1.0,
+        reconnect_max: float = 60.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.on_event = on_event
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="call-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        delay = self.reconnect_min
+        while not self._stop.is_set():
+            try:
+                with socket.create_connection((self.host, self.port), timeout=10) as sock:
+                    logger.info("Call monitor connected to %s:%s", self.host, self.port)
+                    self.connected = True
+                    delay = self.reconnect_min
+                    self._read(sock)
+                    if not self._stop.is_set():
+                        logger.warning("Call monitor connection closed by %s", self.host)
+            except OSError as e:
+                logger.warning("Call monitor %s:%s unavailable: %s", self.host, self.port, e)
+            finally:
+                self.connected = False
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, self.reconnect_max)
+
+    def _read(self, sock: socket.socket) -> None:
+        # Short timeout so stop() is noticed; the box sends nothing while idle.
+        sock.settimeout(1.0)
+        buffer = b""
+        while not self._stop.is_set():
+            try:
+                chunk = sock.recv(4096)
+            except TimeoutError:
+                continue
+            if not chunk:
+                return
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                event = parse_line(line.decode("utf-8", errors="replace"))
+                if event is None:
+                    continue
+                try:
+                    self.on_event(event)
+                except Exception:
+                    logger.exception("Call monitor handler failed for %s", event.kind)
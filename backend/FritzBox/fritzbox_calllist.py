@@ -1,18 +1,28 @@
 """FritzBox call-list client.
 
 * Uses persistent ``requests.Session`` (TCP-Keep-Alive)
-* SID cached up to 1h (avoids brute-force lockout)
+* One shared session (``FritzBoxSession``): concurrent callers wait for a
+  single login, the SID is renewed before the box's idle timeout and a
+  rejected SID is dropped and the request retried once (avoids lockout)
+* PBKDF2 (``2$``) login challenges, MD5 as fallback for older firmware
 * Tenacity-based retries with exponential backoff
 * Pure functions – no module-level secrets
+* The call list is parsed as a stream (``iterparse``): the FritzBox returns
+  calls newest first, so parsing stops at the day cutoff or the row cap
+  instead of materialising the whole document
+* Polling is incremental: ``CallLog`` keeps the recent calls in a ring buffer
+  and asks calllist.lua only for calls newer than the last seen ``id``; a full
+  resync runs every ``fritzbox_full_resync_minutes``
 """
 
 from __future__ import annotations
 
 import hashlib
+import io
+import threading
 import time
 import xml.etree.ElementTree as ET
-from collections import defaultdict
-from dataclasses import dataclass
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
@@ -26,6 +36,7 @@ from tenacity import (
 
 from config import settings
 from logging_config import get_logger
+from metrics import retry_hook
 
 logger = get_logger(__name__)
 
@@ -34,31 +45,38 @@ _session.headers.update({"User-Agent": "home-info-center/2.0"})
 
 _DEFAULT_TIMEOUT = 10
 _SID_TTL = 3600  # 1 hour
+_SID_IDLE_TIMEOUT = 20 * 60  # the box drops SIDs unused for 20 minutes
+_SID_RENEW_MARGIN = 60
 _INVALID_SID = "0000000000000000"
-
-
-@dataclass(slots=True)
-class _SidCache:
-    sid: str | None = None
-    timestamp: float = 0.0
-
-
-_sid_cache = _SidCache()
+_MAX_CALLS = 50
 
 
 class FritzBoxAuthError(RuntimeError):
     """Authentication against FritzBox failed."""
 
 
+class FritzBoxSessionError(RuntimeError):
+    """The FritzBox rejected the session ID."""
+
+
 def _md5_challenge(challenge: str, password: str) -> str:
     digest = hashlib.md5(f"{challenge}-{password}".encode("utf-16le")).hexdigest()
     return f"{challenge}-{digest}"
 
 
+def _pbkdf2_challenge(challenge: str, password: str) -> str:
+    """Answer a ``2$<iter1>$<salt1>$<iter2>$<salt2>`` challenge (FRITZ!OS 7.24+)."""
+    _, iter1, salt1, iter2, salt2 = challenge.split("$")
+    hash1 = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt1), int(iter1))
+    hash2 = hashlib.pbkdf2_hmac("sha256", hash1, bytes.fromhex(salt2), int(iter2))
+    return f"{salt2}${hash2.hex()}"
+
+
 @retry(
     retry=retry_if_exception_type((requests.RequestException,)),
     wait=wait_exponential(multiplier=1, min=2, max=15),
     stop=stop_after_attempt(3),
+    before_sleep=retry_hook("fritzbox"),
     reraise=True,
 )
 def _http_get(url: str, **kwargs) -> requests.Response:
@@ -69,7 +87,7 @@ def get_sid(user: str, password: str, fritzbox_ip: str) -> str:
     """Authenticate against FritzBox and return a SID."""
     url = f"http://{fritzbox_ip}/login_sid.lua"
     try:
-        response = _http_get(url)
+        response = _http_get(url, params={"version": 2})
     except requests.RequestException as e:
         raise ConnectionError(f"FritzBox unreachable: {e}") from e
 
@@ -81,11 +99,15 @@ def get_sid(user: str, password: str, fritzbox_ip: str) -> str:
     challenge = root.findtext("Challenge")
     if not challenge:
         raise FritzBoxAuthError("FritzBox login_sid.lua returned no challenge")
+    if challenge.startswith("2$"):
+        answer = _pbkdf2_challenge(challenge, password)
+    else:
+        answer = _md5_challenge(challenge, password)
 
     try:
         response = _http_get(
             url,
-            params={"username": user, "response": _md5_challenge(challenge, password)},
+            params={"username": user, "response": answer},
         )
     except requests.RequestException as e:
         raise ConnectionError(f"FritzBox unreachable on auth: {e}") from e
@@ -96,17 +118,45 @@ def get_sid(user: str, password: str, fritzbox_ip: str) -> str:
     return sid
 
 
-def get_sid_cached(user: str, password: str, fritzbox_ip: str, ttl: int = _SID_TTL) -> str:
-    """Return a cached SID; renew when older than ``ttl`` seconds."""
-    now = time.time()
-    if _sid_cache.sid and (now - _sid_cache.timestamp) < ttl:
-        return _sid_cache.sid
+class FritzBoxSession:
+    """Shared FritzBox session ID with single-flight login and proactive renewal."""
+
+    def __init__(self, ttl: float = _SID_TTL, idle_timeout: float = _SID_IDLE_TIMEOUT) -> None:
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._sid: str | None = None
+        self._key: tuple[str, str] | None = None
+        self._acquired_at = 0.0
+        self._used_at = 0.0
+
+    def get(self, user: str, password: str, fritzbox_ip: str) -> str:
+        """Return a valid SID; log in (once, for all waiting callers) when needed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._sid and self._key == (user, fritzbox_ip) and not self._expires_soon(now):
+                self._used_at = now
+                return self._sid
+            sid = get_sid(user, password, fritzbox_ip)
+            self._sid, self._key = sid, (user, fritzbox_ip)
+            self._acquired_at = self._used_at = time.monotonic()
+            logger.info("FritzBox: new SID acquired")
+            return sid
+
+    def invalidate(self, sid: str) -> None:
+        """Forget ``sid`` unless another caller already replaced it."""
+        with self._lock:
+            if self._sid == sid:
+                self._sid = None
+
+    def _expires_soon(self, now: float) -> bool:
+        return (
+            now - self._acquired_at > self.ttl - _SID_RENEW_MARGIN
+            or now - self._used_at > self.idle_timeout - _SID_RENEW_MARGIN
+        )
+
 
-    sid = get_sid(user, password, fritzbox_ip)
-    _sid_cache.sid = sid
-    _sid_cache.timestamp = now
-    logger.info("FritzBox: new SID acquired")
-    return sid
+_fritz_session = FritzBoxSession()
 
 
 def _safe_strip_sip(number: str | None) -> str:
@@ -115,64 +165,164 @@ def _safe_strip_sip(number: str | None) -> str:
     return number.replace("sip:", "").replace("SIP:", "").replace("SIP", "").strip(" :")
 
 
-def parse_calllist_xml(xml_data: str | bytes, max_days: int | None = None) -> list[dict]:
-    """Parse FritzBox calllist XML into a list of normalised call dicts."""
+def _parse_date(value: str, tz: ZoneInfo) -> datetime:
+    """Fast path for the fixed ``%d.%m.%y %H:%M`` format (same result as strptime)."""
+    if len(value) != 14 or value[2] != "." or value[5] != "." or value[8] != " " or value[11] != ":":
+        raise ValueError(f"unexpected call date {value!r}")
+    year = int(value[6:8])
+    return datetime(
+        year + (2000 if year < 69 else 1900),
+        int(value[3:5]),
+        int(value[0:2]),
+        int(value[9:11]),
+        int(value[12:14]),
+        tzinfo=tz,
+    )
+
+
+def parse_calllist_xml(xml_data: str | bytes, max_days: int | None = None, limit: int = _MAX_CALLS) -> list[dict]:
+    """Parse FritzBox calllist XML into a list of normalised call dicts.
+
+    Stops at the first call older than the cutoff or after ``limit`` calls.
+    """
     if not xml_data:
         return []
+    if isinstance(xml_data, str):
+        xml_data = xml_data.encode("utf-8")
 
-    root = ET.fromstring(xml_data)
     days = max_days if max_days is not None else settings.fritzbox_calllist_days
     tz = ZoneInfo(settings.timezone)
     cutoff = datetime.now(tz) - timedelta(days=days)
 
     entries: list[dict] = []
-    for call in root.findall("Call"):
-        date_str = call.findtext("Date")
+    root = None
+    for event, elem in ET.iterparse(io.BytesIO(xml_data), events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end" or elem.tag != "Call":
+            continue
+        fields = {child.tag: child.text or "" for child in elem}
+        root.clear()  # drop parsed calls, keep memory flat
+
+        date_str = fields.get("Date")
         if not date_str:
             continue
         try:
-            dt = datetime.strptime(date_str, "%d.%m.%y %H:%M").replace(tzinfo=tz)
+            dt = _parse_date(date_str, tz)
         except ValueError:
             continue
         if dt < cutoff:
-            continue
+            break
 
-        name = (call.findtext("Name") or "").strip()
+        name = (fields.get("Name") or "").strip()
         if not name:
-            name = _safe_strip_sip(call.findtext("Caller"))
+            name = _safe_strip_sip(fields.get("Caller"))
 
-        device = call.findtext("Device") or ""
-        calltype = "11" if device == "Anrufbeantworter" else (call.findtext("Type") or "")
+        calltype = "11" if fields.get("Device") == "Anrufbeantworter" else (fields.get("Type") or "")
 
+        call_id = fields.get("Id", "")
         entries.append(
             {
+                "id": int(call_id) if call_id.isdigit() else None,
                 "type": calltype,
                 "name": name,
-                "caller": _safe_strip_sip(call.findtext("CallerNumber")),
-                "called": _safe_strip_sip(call.findtext("Called")),
+                "caller": _safe_strip_sip(fields.get("CallerNumber")),
+                "called": _safe_strip_sip(fields.get("Called")),
                 "date": dt,
-                "duration": call.findtext("Duration"),
-                "audio_path": call.findtext("Path"),
+                "duration": fields.get("Duration"),
+                "audio_path": fields.get("Path"),
             }
         )
+        if len(entries) >= limit:
+            break
 
     entries.sort(key=lambda x: x["date"], reverse=True)
-    return entries[:50]
+    return entries
 
 
-def get_calls_xml(user: str, password: str, fritzbox_ip: str) -> list[dict]:
-    """Fetch and parse the FritzBox call list."""
-    sid = get_sid_cached(user, password, fritzbox_ip)
+def _fetch_calllist(user: str, password: str, fritzbox_ip: str, **params) -> bytes:
+    """GET calllist.lua; a rejected SID is replaced and the request retried once."""
+    sid = _fritz_session.get(user, password, fritzbox_ip)
+    try:
+        return _get_calllist(fritzbox_ip, sid, params)
+    except FritzBoxSessionError:
+        logger.info("FritzBox: SID rejected, logging in again")
+        _fritz_session.invalidate(sid)
+        return _get_calllist(fritzbox_ip, _fritz_session.get(user, password, fritzbox_ip), params)
+
+
+def _get_calllist(fritzbox_ip: str, sid: str, params: dict) -> bytes:
     # calllist.lua is served on the TR-064 port (49000), not on the regular web UI port.
-    url = f"http://{fritzbox_ip}:49000/calllist.lua?sid={sid}&max=50"
+    url = f"http://{fritzbox_ip}:49000/calllist.lua"
     try:
-        response = _http_get(url)
+        response = _http_get(url, params={"sid": sid, **params})
     except requests.RequestException as e:
         raise ConnectionError(f"FritzBox calllist unreachable: {e}") from e
 
+    # An invalid SID yields 403 or a login page instead of the XML list.
+    if response.status_code in (401, 403) or (response.status_code == 200 and b"<root" not in response.content[:512]):
+        raise FritzBoxSessionError(f"FritzBox calllist rejected SID (HTTP {response.status_code})")
     if response.status_code != 200:
         raise RuntimeError(f"FritzBox calllist HTTP {response.status_code}")
-    return parse_calllist_xml(response.content)
+    return response.content
+
+
+def get_calls_xml(user: str, password: str, fritzbox_ip: str) -> list[dict]:
+    """Fetch and parse the full FritzBox call list (no incremental state)."""
+    days = settings.fritzbox_calllist_days
+    return parse_calllist_xml(_fetch_calllist(user, password, fritzbox_ip, max=_MAX_CALLS, days=days))
+
+
+class CallLog:
+    """Ring buffer of recent calls (newest first), updated incrementally by call id."""
+
+    def __init__(self, size: int = _MAX_CALLS) -> None:
+        self.size = size
+        self.calls: deque[dict] = deque(maxlen=size)
+        self.last_id: int | None = None
+        self.synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def sync(self, user: str, password: str, fritzbox_ip: str) -> list[dict]:
+        """Bring the buffer up to date and return the calls within the day window."""
+        with self._lock:
+            due = time.monotonic() - self.synced_at > settings.fritzbox_full_resync_minutes * 60
+            if self.last_id is None or due or not self._incremental_sync(user, password, fritzbox_ip):
+                self._full_sync(user, password, fritzbox_ip)
+            cutoff = datetime.now(ZoneInfo(settings.timezone)) - timedelta(days=settings.fritzbox_calllist_days)
+            return [c for c in self.calls if c["date"] >= cutoff]
+
+    def _full_sync(self, user: str, password: str, fritzbox_ip: str) -> None:
+        calls = get_calls_xml(user, password, fritzbox_ip)
+        self.calls.clear()
+        self.calls.extend(calls)
+        self.last_id = max((c["id"] for c in calls if c["id"] is not None), default=None)
+        self.synced_at = time.monotonic()
+
+    def _incremental_sync(self, user: str, password: str, fritzbox_ip: str) -> bool:
+        """Merge calls newer than ``last_id``; False if a full resync is needed."""
+        last_id = self.last_id
+        if last_id is None:
+            return False
+        xml_data = _fetch_calllist(
+            user,
+            password,
+            fritzbox_ip,
+            id=last_id,
+            max=self.size,
+            days=settings.fritzbox_calllist_days,
+        )
+        new = [c for c in parse_calllist_xml(xml_data, limit=self.size) if (c["id"] or 0) > last_id]
+        if len(new) >= self.size:
+            return False  # buffer overrun: there may be a gap
+        self.calls.extendleft(reversed(new))
+        if new:
+            self.last_id = max(c["id"] for c in new)
+            logger.info("FritzBox: %d new call(s)", len(new))
+        return True
+
+
+_call_log = CallLog()
 
 
 def get_calls_grouped(
@@ -187,7 +337,7 @@ def get_calls_grouped(
     if not (user and password and fritzbox_ip):
         raise ValueError("FritzBox credentials missing in settings")
 
-    calls = get_calls_xml(user, password, fritzbox_ip)
+    calls = _call_log.sync(user, password, fritzbox_ip)
     grouped: dict[str, list[dict]] = defaultdict(list)
     for call in calls:
         day_key = call["date"].strftime("%Y-%m-%d")
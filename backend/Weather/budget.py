@@ -0,0 +1,57 @@
+"""Token-bucket request budget for the OpenWeather API.
+
+Two buckets must both grant a token: one refilled over a day (the free-tier
+daily quota) and one refilled over a minute (burst limit). When either is
+empty the request is refused locally instead of earning a 429 upstream.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class TokenBucket:
+    """``capacity`` tokens, refilled continuously over ``per_seconds``."""
+
+    def __init__(self, capacity: float, per_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RequestBudget:
+    """Daily plus per-minute budget; thread-safe."""
+
+    def __init__(self, per_day: int, per_minute: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.per_day = per_day
+        self._buckets = (TokenBucket(per_day, 86400, clock), TokenBucket(per_minute, 60, clock))
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take one request from every bucket, or none if any is empty."""
+        with self._lock:
+            for bucket in self._buckets:
+                bucket.refill()
+            if any(bucket.tokens < 1 for bucket in self._buckets):
+                return False
+            for bucket in self._buckets:
+                bucket.tokens -= 1
+            return True
+
+    def remaining(self) -> dict[str, int]:
+        with self._lock:
+            for bucket in self._buckets:
+                bucket.refill()
+            return {"day": int(self._buckets[0].tokens), "minute": int(self._buckets[1].tokens)}
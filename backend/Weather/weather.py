@@ -1,12 +1,32 @@
-"""OpenWeather One-Call API client (hourly + daily forecasts)."""
+"""OpenWeather One-Call API client (hourly + daily forecasts).
+
+* One raw One-Call response per refresh feeds every view; it is kept for
+  ``weather_raw_ttl`` seconds so further views (alerts, minutely, ...) or
+  concurrent callers cost no extra upstream request.
+* The views (``hourly_from``, ``daily_from``) are pure transforms over that
+  raw response.
+* Several locations (``weather_locations``) are fetched concurrently; the
+  first is the primary one, the others appear under ``locations``.
+* Every upstream request draws from a daily and a per-minute token bucket;
+  ``refresh_interval`` stretches the job interval so the configured
+  locations stay within the daily budget.
+* Fetching is async only (httpx on the shared ``async_engine`` loop,
+  ``asyncio.gather`` across locations, tenacity backoff via
+  ``asyncio.sleep``); concurrent callers for one location share a single
+  in-flight request. Each event loop gets its own ``httpx.AsyncClient``.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import math
+import time
+import weakref
 from collections import defaultdict
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-import requests
+import httpx
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -14,54 +34,131 @@ from tenacity import (
     wait_exponential,
 )
 
-from config import settings
+from config import WeatherLocation, settings
 from logging_config import get_logger
+from metrics import retry_hook
+from Weather.budget import RequestBudget
 
 logger = get_logger(__name__)
 
-_session = requests.Session()
-_session.headers.update({"User-Agent": "home-info-center/2.0"})
 _DEFAULT_TIMEOUT = 20
 
 _BASE_URL = "https://api.openweathermap.org/data/3.0/onecall"
+# Nothing is excluded: every view is derived from the same response.
+_ONECALL_EXCLUDE = ""
+
+# Share of the daily budget the scheduled refreshes may use; the rest is
+# headroom for restarts and manual refreshes.
+_BUDGET_SHARE = 0.9
+
+_budget = RequestBudget(settings.weather_daily_budget, settings.weather_minute_budget)
+_raw_cache: dict[str, tuple[float, dict]] = {}
+_in_flight: dict[str, asyncio.Task] = {}
+# httpx clients are bound to the loop they were first used on.
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = weakref.WeakKeyDictionary()
 
 
 class WeatherConfigError(RuntimeError):
     """Weather API configuration is incomplete."""
 
 
-@retry(
-    retry=retry_if_exception_type((requests.RequestException,)),
-    wait=wait_exponential(multiplier=1, min=2, max=20),
-    stop=stop_after_attempt(3),
-    reraise=True,
-)
-def _fetch(exclude: str) -> dict:
+class WeatherBudgetError(RuntimeError):
+    """The local OpenWeather request budget is used up."""
+
+
+def _request_params(exclude: str, lat: float, lon: float) -> dict:
+    """Query parameters for one request; draws one token from the budget."""
     if not settings.openweather_api_key:
         raise WeatherConfigError("OPENWEATHER_API_KEY not set")
+    if not _budget.try_acquire():
+        raise WeatherBudgetError(f"OpenWeather request budget exhausted ({_budget.remaining()})")
     params = {
-        "lat": settings.weather_location_lat,
-        "lon": settings.weather_location_lon,
-        "exclude": exclude,
+        "lat": lat,
+        "lon": lon,
         "units": "metric",
         "lang": "de",
         "appid": settings.openweather_api_key,
     }
+    if exclude:
+        params["exclude"] = exclude
+    return params
+
+
+def _client() -> httpx.AsyncClient:
+    # One per running loop, reused by every request on it; dropped with the loop.
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = httpx.AsyncClient(
+            headers={"User-Agent": "home-info-center/2.0"},
+            timeout=_DEFAULT_TIMEOUT,
+        )
+    return client
+
+
+@retry(
+    retry=retry_if_exception_type((ConnectionError,)),
+    wait=wait_exponential(multiplier=1, min=2, max=20),
+    stop=stop_after_attempt(3),
+    before_sleep=retry_hook("openweather"),
+    reraise=True,
+)
+async def _fetch_async(exclude: str, lat: float, lon: float) -> dict:
+    params = _request_params(exclude, lat, lon)
     try:
-        response = _session.get(_BASE_URL, params=params, timeout=_DEFAULT_TIMEOUT)
+        response = await _client().get(_BASE_URL, params=params)
         response.raise_for_status()
-    except requests.exceptions.Timeout as e:
+    except httpx.TimeoutException as e:
         raise ConnectionError(f"Weather API timeout: {e}") from e
-    except requests.exceptions.ConnectionError as e:
+    except httpx.TransportError as e:
         raise ConnectionError(f"Weather API connection error: {e}") from e
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         raise RuntimeError(f"Weather API HTTP error: {e}") from e
     return response.json()
 
 
-def get_hourly_forecast() -> dict[str, list[dict]]:
-    """Return hourly forecast for the next 6 hours, grouped by day (YYYY-MM-DD)."""
-    data = _fetch(exclude="current,minutely,daily,alerts")
+async def _fetch_raw(loc: WeatherLocation) -> dict:
+    data = await _fetch_async(exclude=_ONECALL_EXCLUDE, lat=loc.lat, lon=loc.lon)
+    _raw_cache[loc.name] = (time.monotonic(), data)
+    return data
+
+
+async def get_onecall_async(location: WeatherLocation | None = None, max_age: float | None = None) -> dict:
+    """Return the raw One-Call response, fetching at most once per ``max_age`` seconds.
+
+    ``location`` defaults to the primary location. Concurrent callers for the
+    same location await its single in-flight fetch.
+    """
+    loc = location or settings.weather_location_list[0]
+    ttl = settings.weather_raw_ttl if max_age is None else max_age
+    cached = _raw_cache.get(loc.name)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    task = _in_flight.get(loc.name)
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = _in_flight[loc.name] = asyncio.create_task(_fetch_raw(loc))
+    # Cancelling the caller (job deadline) cancels the fetch itself.
+    return await task
+
+
+def refresh_interval(requested: int) -> int:
+    """``requested`` seconds, stretched so all locations fit the daily budget."""
+    per_refresh = len(settings.weather_location_list)
+    minimum = math.ceil(86400 * per_refresh / (settings.weather_daily_budget * _BUDGET_SHARE))
+    if minimum > requested:
+        logger.warning(
+            "Weather interval stretched from %ss to %ss (%d locations, %d requests/day)",
+            requested,
+            minimum,
+            per_refresh,
+            settings.weather_daily_budget,
+        )
+        return minimum
+    return requested
+
+
+def hourly_from(data: dict) -> dict[str, list[dict]]:
+    """Hourly forecast for the next 6 hours, grouped by day (YYYY-MM-DD)."""
     tz = ZoneInfo(settings.timezone)
     now = datetime.now(tz)
     end = now + timedelta(hours=6)
@@ -84,9 +181,8 @@ def get_hourly_forecast() -> dict[str, list[dict]]:
     return dict(sorted(forecast_by_day.items()))
 
 
-def get_daily_forecast() -> list[dict]:
-    """Return daily forecast for the next 4 days."""
-    data = _fetch(exclude="current,minutely,hourly,alerts")
+def daily_from(data: dict) -> list[dict]:
+    """Daily forecast for the next 4 days."""
     tz = ZoneInfo(settings.timezone)
     forecast: list[dict] = []
     for day in data.get("daily", [])[:4]:
@@ -101,3 +197,31 @@ def get_daily_forecast() -> list[dict]:
             }
         )
     return forecast
+
+
+def _views(data: dict) -> dict:
+    return {"weekly_weather": hourly_from(data), "daily_weather": daily_from(data)}
+
+
+async def get_weather_async() -> dict:
+    """Payload of the ``weather`` cache: all views, one upstream request per location.
+
+    The primary location's views sit at the top level; further locations are
+    keyed by name under ``locations``. A failing secondary location is left
+    out, a failing primary one fails the refresh.
+    """
+    primary, *others = settings.weather_location_list
+    results = await asyncio.gather(*(get_onecall_async(loc) for loc in [primary, *others]), return_exceptions=True)
+    if isinstance(results[0], BaseException):
+        raise results[0]
+    payload = _views(results[0])
+    if not others:
+        return payload
+
+    payload["locations"] = {}
+    for loc, result in zip(others, results[1:], strict=True):
+        if isinstance(result, BaseException):
+            logger.warning("Weather for '%s' failed: %s", loc.name, result)
+        else:
+            payload["locations"][loc.name] = _views(result)
+    return payload
@@ -4,27 +4,64 @@
 * ETag-based cache validation – clients send ``If-None-Match`` and receive
   ``304 Not Modified`` when their copy is current. Replaces the legacy
   ``/api/<x>-version`` polling endpoints (BREAKING change).
-* Server-Sent Events stream at ``/api/stream`` for live invalidation.
+* Response bodies are rendered once per cache change by ``cache_service``;
+  request handlers only copy the stored bytes out.
+* Pre-compressed variants (br/zstd/gzip) are picked via ``Accept-Encoding``,
+  each with its own ETag and ``Vary: Accept-Encoding``.
+* Server-Sent Events stream at ``/api/stream`` for live invalidation, fanned
+  out by one shared ``sse.broadcaster``. ``?mode=inline|patch`` embeds the new
+  body or a JSON patch so displays skip the follow-up GET.
+* ``GET /api/<name>?since=<etag>`` answers with a JSON patch
+  (``application/json-patch+json``) when ``<etag>`` is still in the cache's
+  version history, and with the full body otherwise.
 * Background updates run via APScheduler (see ``cache_service``).
+* ``POST /api/refresh/<name>`` fetches a cache now (single-flight, rate
+  limited per cache) and answers with the fresh ETag, or ``202`` when the run
+  outlasts ``REFRESH_TIMEOUT_SECONDS`` or was forwarded to the leader worker.
+* ``/api/health`` is the liveness probe (Docker HEALTHCHECK) and reports
+  per-cache readiness; ``/api/health/ready`` is 503 until every cache has data.
+* Prometheus metrics at ``/api/metrics`` (job phases, errors, SSE, HTTP
+  latency and 200/304 counts per endpoint; see ``metrics``).
+* Opt-in profiling (``profiling``): toggled via ``POST /api/debug/profiling``
+  or ``SIGRTMIN+2``; captures are listed at ``/api/debug/profiles`` and
+  downloadable as pstats or speedscope. Debug routes need ``DEBUG_TOKEN``.
+* Optional FritzBox call monitor: a finished call (``DISCONNECT``) triggers an
+  immediate ``calls`` refresh, so polling is only the safety net. It runs in
+  the worker holding the scheduler lease and moves along with the lease.
 """
 
 from __future__ import annotations
 
 import atexit
+import contextlib
+import hmac
 import json
+import signal
+import threading
 import time
 from datetime import datetime
-from queue import Empty
 from typing import TYPE_CHECKING
 
-from flask import Flask, Response, jsonify, request, send_from_directory
+from flask import Flask, Response, g, jsonify, request, send_from_directory
 
-from cache_service import CacheJob, cache_service
+import metrics
+from cache_service import (
+    CacheJob,
+    RefreshRateLimitedError,
+    UnknownCacheError,
+    cache_service,
+    time_of_day_profile,
+)
 from Calendar.get_events import get_all_events
+from compression import base_etag, negotiate, variant_etag
 from config import settings
+from FritzBox.call_monitor import CallEvent, CallMonitor
 from FritzBox.fritzbox_calllist import get_calls_grouped
 from logging_config import configure_logging, get_logger
-from Weather.weather import get_daily_forecast, get_hourly_forecast
+from profiling import profiler
+from shared_store import SharedStore
+from sse import MODES, broadcaster
+from Weather.weather import get_weather_async, refresh_interval
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -39,6 +76,10 @@ def _json_default(obj):
 def _json_response(payload, etag: str, status: int = 200) -> Response:
     """Jsonify with ETag/Cache-Control headers."""
     body = json.dumps(payload, ensure_ascii=False, default=_json_default)
+    return _body_response(body, etag, status)
+
+
+def _body_response(body: str | bytes, etag: str, status: int = 200) -> Response:
     resp = Response(body, status=status, mimetype="application/json")
     if etag:
         resp.headers["ETag"] = etag
@@ -46,8 +87,16 @@ def _json_response(payload, etag: str, status: int = 200) -> Response:
     return resp
 
 
-def _conditional(name: str, payload_builder):
-    """Helper for ETag-aware GET endpoints."""
+def _etag_matches(header: str | None, etag: str) -> bool:
+    """True when ``If-None-Match`` names ``etag`` or any encoded variant of it."""
+    if not header:
+        return False
+    return any(tag.strip() == "*" or base_etag(tag) == etag for tag in header.split(","))
+
+
+def _conditional(name: str):
+    """Helper for ETag-aware GET endpoints (serves the pre-rendered body)."""
+    cache_service.note_demand()
     entry = cache_service.get(name)
     if not entry.etag:
         return _json_response(
@@ -55,19 +104,58 @@ def _conditional(name: str, payload_builder):
             etag="",
             status=503,
         )
-    if request.headers.get("If-None-Match") == entry.etag:
+    encoding = negotiate(request.headers.get("Accept-Encoding"), entry.variants)
+    etag = variant_etag(entry.etag, encoding)
+    since = base_etag(request.args.get("since", ""))
+    if since == entry.etag or _etag_matches(request.headers.get("If-None-Match"), entry.etag):
         resp = Response(status=304)
-        resp.headers["ETag"] = entry.etag
-        return resp
-    return _json_response(payload_builder(entry), entry.etag)
+        resp.headers["ETag"] = etag
+    elif since and (delta := cache_service.delta(name, since)) is not None:
+        resp = _body_response(delta, entry.etag)
+        resp.mimetype = "application/json-patch+json"
+        resp.headers["Delta-Base"] = since
+    else:
+        resp = _body_response(entry.variants[encoding] if encoding else entry.body, etag)
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+
+# --- endpoint views (rendered once per change, see CacheJob.view) ---------------
+
+
+def _events_view(data, etag: str) -> dict:
+    return {"data": data, "etag": etag}
+
+
+def _calls_view(data, etag: str) -> dict:
+    return {"calls": data, "etag": etag}
+
+
+def _weather_view(data, etag: str) -> dict:
+    return {**data, "etag": etag}
 
 
 def _register_jobs() -> None:
+    # Warm-up order: calls (one cheap local request) first, then weather, then
+    # the calendars (Google discovery + one request per calendar).
+    quiet = settings.quiet_hours_range
+    profile = time_of_day_profile(*quiet, settings.quiet_hours_factor) if quiet else None
+    weather_interval = refresh_interval(settings.interval_weather)
     cache_service.register(
         CacheJob(
             name="events",
             fetch=get_all_events,
             interval_seconds=settings.interval_calendar,
+            view=_events_view,
+            upstream="google",
+            max_interval=settings.interval_calendar_max,
+            backoff=settings.interval_backoff,
+            profile=profile,
+            timeout=settings.fetch_timeout_seconds,
+            priority=2,
+            jitter=settings.warmup_jitter_seconds,
         )
     )
     cache_service.register(
@@ -75,30 +163,122 @@ def _register_jobs() -> None:
             name="calls",
             fetch=get_calls_grouped,
             interval_seconds=settings.interval_calls,
+            view=_calls_view,
+            upstream="fritzbox",
+            max_interval=settings.interval_calls_max,
+            backoff=settings.interval_backoff,
+            profile=profile,
+            timeout=settings.fetch_timeout_seconds,
+            priority=0,
         )
     )
     cache_service.register(
         CacheJob(
             name="weather",
-            fetch=lambda: {
-                "weekly_weather": get_hourly_forecast(),
-                "daily_weather": get_daily_forecast(),
-            },
-            interval_seconds=settings.interval_weather,
+            fetch=get_weather_async,
+            timeout=settings.fetch_timeout_seconds,
+            interval_seconds=weather_interval,
+            view=_weather_view,
+            upstream="openweather",
+            max_interval=max(settings.interval_weather_max, weather_interval),
+            backoff=settings.interval_backoff,
+            profile=profile,
+            priority=1,
+            jitter=settings.warmup_jitter_seconds,
         )
     )
 
 
+def _on_call_event(event: CallEvent) -> None:
+    if event.kind != "DISCONNECT":
+        return
+    timer = threading.Timer(settings.fritzbox_call_monitor_delay, cache_service.trigger, args=("calls",))
+    timer.daemon = True
+    timer.start()
+
+
+def _start_call_monitor() -> None:
+    if not (settings.fritzbox_call_monitor and settings.fritzbox_ip_address):
+        return
+    monitor = CallMonitor(settings.fritzbox_ip_address, _on_call_event, port=settings.fritzbox_call_monitor_port)
+
+    # Only the lease holder listens (the box allows few connections and each
+    # DISCONNECT would otherwise trigger one refresh per worker).
+    def _follow_lease(leader: bool) -> None:
+        if leader:
+            monitor.start()
+        else:
+            monitor.stop()
+
+    cache_service.on_leadership_change(_follow_lease)
+    atexit.register(monitor.stop)
+
+
+def _debug_authorized() -> bool:
+    if not settings.debug_token:
+        return False
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    return hmac.compare_digest(supplied.encode(), settings.debug_token.encode())
+
+
+def _debug_disabled() -> tuple[Response, int]:
+    # Same answer for "disabled" and "wrong token"; no SPA fallback.
+    return jsonify({"error": "not found"}), 404
+
+
+def _install_profile_signal() -> None:
+    """``kill -s RTMIN+2 <worker pid>`` toggles profiling in that worker.
+
+    Not SIGUSR1/SIGUSR2: gunicorn uses those for log reopening and re-exec.
+    """
+
+    def _handler(*_: object) -> None:
+        # The interrupted frame may hold the profiler lock; toggle elsewhere.
+        threading.Thread(target=profiler.toggle, name="profile-toggle", daemon=True).start()
+
+    # Not the main thread / no real-time signals (macOS, Windows): endpoint only.
+    with contextlib.suppress(ValueError, AttributeError):
+        signal.signal(signal.SIGRTMIN + 2, _handler)
+
+
 def create_app() -> Flask:
     configure_logging(settings.log_level)
     logger = get_logger(__name__)
     app = Flask(__name__, static_folder="static", static_url_path="")
 
+    if settings.cache_snapshot_file:
+        cache_service.restore(settings.cache_snapshot_file)
+    if settings.cache_shared_store_file:
+        cache_service.attach_store(SharedStore(settings.cache_shared_store_file, settings.cache_lease_seconds))
+    if settings.idle_after_minutes:
+        cache_service.enable_idle(settings.idle_after_minutes * 60, settings.idle_interval)
+    cache_service.set_warmup(settings.warmup_step_seconds)
+    cache_service.set_circuit_breaker(settings.circuit_failure_threshold, settings.circuit_reset_seconds)
+    profiler.keep = settings.profile_keep
+    _install_profile_signal()
     _register_jobs()
+    cache_service.subscribe(broadcaster)
     cache_service.start()
     atexit.register(cache_service.shutdown)
+    _start_call_monitor()
     logger.info("home-info-center backend ready")
 
+    @app.before_request
+    def _start_timer() -> None:
+        g.request_started = time.perf_counter()
+        if profiler.enabled and request.url_rule and not request.path.startswith("/api/debug/"):
+            g.profile = profiler.begin("http", request.url_rule.rule)
+
+    @app.after_request
+    def _observe(resp: Response) -> Response:
+        if "profile" in g:
+            profiler.end(g.pop("profile"))
+        # Route pattern, not the raw path, keeps the label set bounded.
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.HTTP_SECONDS.labels(endpoint, request.method).observe(time.perf_counter() - g.request_started)
+        metrics.HTTP_RESPONSES.labels(endpoint, request.method, str(resp.status_code)).inc()
+        return resp
+
     # --- static / SPA fallback ---------------------------------------------------
 
     @app.route("/")
@@ -113,15 +293,15 @@ def create_app() -> Flask:
 
     @app.route("/api/events")
     def api_events():
-        return _conditional("events", lambda e: {"data": e.data, "etag": e.etag})
+        return _conditional("events")
 
     @app.route("/api/calls")
     def api_calls():
-        return _conditional("calls", lambda e: {"calls": e.data, "etag": e.etag})
+        return _conditional("calls")
 
     @app.route("/api/weather")
     def api_weather():
-        return _conditional("weather", lambda e: {**e.data, "etag": e.etag})
+        return _conditional("weather")
 
     @app.route("/api/calendars")
     def api_calendars() -> Response:
@@ -132,10 +312,12 @@ def create_app() -> Flask:
 
     @app.route("/api/config")
     def api_config():
+        # The primary weather location drives the theme's sunrise/sunset.
+        primary = settings.weather_location_list[0]
         return jsonify(
             {
-                "lat": settings.weather_location_lat,
-                "lon": settings.weather_location_lon,
+                "lat": primary.lat,
+                "lon": primary.lon,
                 "theme_day_bg": settings.theme_day_bg,
                 "theme_day_text": settings.theme_day_text,
                 "theme_evening_bg": settings.theme_evening_bg,
@@ -143,36 +325,106 @@ def create_app() -> Flask:
             }
         )
 
+    @app.route("/api/refresh/<name>", methods=["POST"])
+    def api_refresh(name: str):
+        try:
+            etag = cache_service.refresh(
+                name,
+                timeout=settings.refresh_timeout_seconds,
+                min_interval=settings.refresh_min_interval,
+            )
+        except UnknownCacheError:
+            return _json_response({"error": f"unknown cache '{name}'"}, etag="", status=404)
+        except RefreshRateLimitedError as e:
+            resp = _json_response({"error": str(e), "etag": cache_service.get(name).etag}, etag="", status=429)
+            resp.headers["Retry-After"] = str(int(e.retry_after) + 1)
+            return resp
+        except TimeoutError:
+            # Still running (or forwarded to the leader worker); SSE announces the result.
+            return _json_response({"status": "pending", "etag": cache_service.get(name).etag}, etag="", status=202)
+        entry = cache_service.get(name)
+        return _json_response(
+            {"name": name, "etag": etag, "updated_at": entry.updated_at, "last_error": entry.last_error},
+            etag=etag,
+        )
+
     # --- health & observability -------------------------------------------------
 
     @app.route("/api/health")
     def api_health():
+        """Liveness (Docker HEALTHCHECK): 200 while the scheduler runs, even during warm-up."""
+        snapshot = cache_service.snapshot()
+        alive = cache_service.running
+        return (
+            jsonify(
+                {
+                    "status": "ok" if alive else "down",
+                    "ready": all(v["ready"] for v in snapshot.values()),
+                    "cold_start_seconds": cache_service.cold_start_seconds,
+                    "caches": snapshot,
+                    "sse_clients": broadcaster.client_count,
+                    "scheduler_leader": cache_service.is_leader,
+                }
+            ),
+            200 if alive else 503,
+        )
+
+    @app.route("/api/metrics")
+    def api_metrics() -> Response:
+        return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE_LATEST)
+
+    @app.route("/api/health/ready")
+    def api_ready():
+        """Readiness: 503 until every cache can serve data."""
         snapshot = cache_service.snapshot()
-        all_ready = all(v["has_data"] for v in snapshot.values())
-        status = 200 if all_ready else 503
-        return jsonify({"status": "ok" if all_ready else "degraded", "caches": snapshot}), status
+        waiting = sorted(name for name, v in snapshot.items() if not v["ready"])
+        return jsonify({"ready": not waiting, "waiting_for": waiting}), 503 if waiting else 200
+
+    # --- debug / profiling -------------------------------------------------------
+
+    @app.route("/api/debug/profiling", methods=["POST"])
+    def api_debug_profiling():
+        if not _debug_authorized():
+            return _debug_disabled()
+        body = request.get_json(silent=True) or {}
+        profiler.configure(bool(body.get("enabled", True)), bool(body.get("trace_memory", False)))
+        return jsonify({"enabled": profiler.enabled, "trace_memory": profiler.trace_memory})
+
+    @app.route("/api/debug/profiles")
+    def api_debug_profiles():
+        if not _debug_authorized():
+            return _debug_disabled()
+        return jsonify({"enabled": profiler.enabled, "profiles": profiler.records()})
+
+    @app.route("/api/debug/profiles/<int:profile_id>")
+    def api_debug_profile(profile_id: int):
+        if not _debug_authorized():
+            return _debug_disabled()
+        record = profiler.get(profile_id)
+        if record is None:
+            return jsonify({"error": f"unknown profile {profile_id}"}), 404
+        fmt = request.args.get("format", "speedscope")
+        stem = f"{record.kind}-{record.name.strip('/').replace('/', '_') or 'root'}-{record.id}"
+        if fmt == "pstats":
+            body, mimetype, suffix = record.to_pstats(), "application/octet-stream", "prof"
+        elif fmt == "speedscope":
+            body, mimetype, suffix = json.dumps(record.to_speedscope()).encode(), "application/json", "speedscope.json"
+        else:
+            return jsonify({"error": "format must be pstats or speedscope"}), 400
+        return Response(
+            body, mimetype=mimetype, headers={"Content-Disposition": f'attachment; filename="{stem}.{suffix}"'}
+        )
 
     # --- live update stream (SSE) -----------------------------------------------
 
     @app.route("/api/stream")
     def api_stream():
-        def event_generator():
-            queue = cache_service.subscribe()
-            try:
-                # Initial keep-alive comment
-                yield ": connected\n\n"
-                while True:
-                    try:
-                        msg = queue.get(timeout=25)
-                        yield (f"event: cache-updated\ndata: {json.dumps(msg)}\n\n")
-                    except Empty:
-                        # heartbeat to keep the connection alive
-                        yield f": ping {int(time.time())}\n\n"
-            finally:
-                cache_service.unsubscribe(queue)
-
+        mode = request.args.get("mode", "notify")
+        if mode not in MODES:
+            return _json_response({"error": f"mode must be one of {', '.join(MODES)}"}, etag="", status=400)
+        cache_service.note_demand()
         return Response(
-            event_generator(),
+            broadcaster.stream(heartbeat=settings.sse_heartbeat_seconds, mode=mode),
             mimetype="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
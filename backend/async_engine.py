@@ -0,0 +1,77 @@
+"""Shared asyncio event loop for async cache fetchers.
+
+* One daemon thread runs one event loop; the async ``CacheJob.fetch``
+  coroutines of all jobs share it, so waiting on upstream I/O (and on
+  tenacity backoff, which uses ``asyncio.sleep`` for coroutines) costs no
+  scheduler thread.
+* ``spawn`` schedules a coroutine and returns immediately, ``run`` blocks the
+  caller until it finishes. ``stop`` cancels whatever is still pending.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any
+
+from logging_config import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Coroutine
+    from concurrent.futures import Future
+
+logger = get_logger(__name__)
+
+
+class AsyncEngine:
+    """Lazily started event loop on a daemon thread."""
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+                    loop.close()
+
+                self._thread = threading.Thread(target=_run, name="async-fetch", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def spawn(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Schedule ``coro`` on the loop; the returned future can be cancelled."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Run ``coro`` on the loop and wait for its result."""
+        return self.spawn(coro).result()
+
+    def stop(self) -> None:
+        """Cancel pending tasks and stop the loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None or loop.is_closed():
+            return
+
+        def _cancel_all() -> None:
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.call_soon(loop.stop)
+
+        loop.call_soon_threadsafe(_cancel_all)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+engine = AsyncEngine()
@@ -0,0 +1 @@
+"""Offline benchmarks for the home-info-center backend."""
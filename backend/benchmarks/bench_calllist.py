@@ -0,0 +1,93 @@
+"""FritzBox call-list parser benchmark on a synthetic, newest-first call list.
+
+Compares the streaming ``parse_calllist_xml`` against the previous
+full-tree implementation for several ``fritzbox_calllist_days`` values.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.bench_calllist --calls 10000 --days 4,30,365
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from config import settings
+from FritzBox.fritzbox_calllist import _safe_strip_sip, parse_calllist_xml
+
+
+def synthetic_calllist(calls: int, span_days: int = 365) -> bytes:
+    """``calls`` entries, newest first, spread evenly over ``span_days``."""
+    now = datetime.now()
+    step = timedelta(days=span_days) / max(calls, 1)
+    items = []
+    for i in range(calls):
+        date = (now - step * i).strftime("%d.%m.%y %H:%M")
+        items.append(
+            f"<Call><Id>{calls - i}</Id><Type>{i % 3 + 1}</Type><Caller>0170{i:07d}</Caller>"
+            f"<Called>SIP: 089123456</Called><Name>Kontakt {i % 97}</Name><Numbertype>sip</Numbertype>"
+            f"<Device>Telefon</Device><Port>10</Port><Date>{date}</Date><Duration>0:0{i % 10}</Duration>"
+            f"<Count></Count><Path /></Call>"
+        )
+    return f'<?xml version="1.0" encoding="UTF-8"?><root><timestamp>0</timestamp>{"".join(items)}</root>'.encode()
+
+
+def legacy_parse(xml_data: bytes, max_days: int) -> list[dict]:
+    """The previous implementation: full tree, strptime per call, sort, slice."""
+    root = ET.fromstring(xml_data)
+    tz = ZoneInfo(settings.timezone)
+    cutoff = datetime.now(tz) - timedelta(days=max_days)
+    entries: list[dict[str, Any]] = []
+    for call in root.findall("Call"):
+        date_str = call.findtext("Date")
+        if not date_str:
+            continue
+        try:
+            dt = datetime.strptime(date_str, "%d.%m.%y %H:%M").replace(tzinfo=tz)
+        except ValueError:
+            continue
+        if dt < cutoff:
+            continue
+        name = (call.findtext("Name") or "").strip() or _safe_strip_sip(call.findtext("Caller"))
+        entries.append(
+            {
+                "type": call.findtext("Type") or "",
+                "name": name,
+                "caller": _safe_strip_sip(call.findtext("CallerNumber")),
+                "called": _safe_strip_sip(call.findtext("Called")),
+                "date": dt,
+                "duration": call.findtext("Duration"),
+                "audio_path": call.findtext("Path"),
+            }
+        )
+    entries.sort(key=lambda x: x["date"], reverse=True)
+    return entries[:50]
+
+
+def _best_ms(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=10_000)
+    parser.add_argument("--days", default="4,30,365", help="comma-separated fritzbox_calllist_days values")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    xml_data = synthetic_calllist(args.calls)
+    print(f"calls={args.calls} xml={len(xml_data) / 1024:.0f} KiB")
+    print(f"{'days':>6} {'legacy ms':>10} {'stream ms':>10} {'speedup':>8}")
+    for days in (int(x) for x in args.days.split(",")):
+        legacy = _best_ms(lambda d=days: legacy_parse(xml_data, d), args.repeat)
+        stream = _best_ms(lambda d=days: parse_calllist_xml(xml_data, max_days=d), args.repeat)
+        print(f"{days:>6} {legacy:>10.2f} {stream:>10.2f} {legacy / stream:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
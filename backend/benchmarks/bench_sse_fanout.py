@@ -0,0 +1,120 @@
+"""SSE fan-out benchmark: connection count vs. memory and delivery latency.
+
+Simulates N idle ``/api/stream`` clients on one ``sse.Broadcaster`` and
+publishes a few updates through ``CacheService._publish``. Reports memory per
+connection (tracemalloc + RSS) and publish-to-client latency.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.bench_sse_fanout --clients 10,100,500
+    python -m benchmarks.bench_sse_fanout --clients 10,100,1000 --gevent
+"""
+
+from __future__ import annotations
+
+import sys
+
+if "--gevent" in sys.argv:  # must patch before threading is imported anywhere
+    from gevent import monkey
+
+    monkey.patch_all()
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from cache_service import CacheService
+from sse import Broadcaster
+
+
+def _rss_kib() -> int:
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        import os
+
+        return int(statm.read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _client(broadcaster: Broadcaster, expected: int, latencies: list[float], ready: threading.Barrier) -> None:
+    gen = broadcaster.stream(heartbeat=60)
+    next(gen)  # ": connected" – cursor is now registered
+    ready.wait()
+    for frame in gen:
+        if frame.startswith(":"):
+            continue
+        sent = float(json.loads(frame.split("data: ", 1)[1])["etag"])
+        latencies.append(time.perf_counter() - sent)
+        expected -= 1
+        if expected == 0:
+            break
+    gen.close()
+
+
+def run(clients: int, messages: int) -> dict:
+    svc = CacheService()
+    broadcaster = Broadcaster()
+    svc.subscribe(broadcaster)
+    latencies: list[float] = []
+    ready = threading.Barrier(clients + 1)
+
+    rss_before = _rss_kib()
+    tracemalloc.start()
+    workers = [
+        threading.Thread(target=_client, args=(broadcaster, messages, latencies, ready), daemon=True)
+        for _ in range(clients)
+    ]
+    for w in workers:
+        w.start()
+    ready.wait()
+    time.sleep(0.2)  # let every client park in Condition.wait
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = _rss_kib()
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        # the send timestamp travels in the etag field through the real _publish path
+        svc._publish("bench", f"{time.perf_counter():.9f}")
+        time.sleep(0.05)
+    for w in workers:
+        w.join(timeout=30)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "connected": broadcaster.client_count,
+        "kib_per_conn_traced": traced / 1024 / clients,
+        "kib_per_conn_rss": (rss_after - rss_before) / clients,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "elapsed_s": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="10,100,500", help="comma-separated connection counts")
+    parser.add_argument("--messages", type=int, default=5)
+    parser.add_argument("--gevent", action="store_true", help="run clients as greenlets (gunicorn gevent mode)")
+    args = parser.parse_args()
+
+    print(f"mode={'gevent' if args.gevent else 'threads'}")
+    print(f"{'clients':>8} {'KiB/conn (py)':>14} {'KiB/conn (rss)':>15} {'p50 ms':>8} {'p99 ms':>8}")
+    for n in (int(x) for x in args.clients.split(",")):
+        r = run(n, args.messages)
+        print(
+            f"{r['clients']:>8} {r['kib_per_conn_traced']:>14.1f} {r['kib_per_conn_rss']:>15.1f} "
+            f"{r['latency_p50_ms']:>8.2f} {r['latency_p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Backend hot-path micro-benchmarks with a stored baseline and regression gate.
+
+Synthetic fixtures of realistic sizes, no network: the call list, calendar
+events, OpenWeather payload and cache entries are generated in-process.
+
+* Each case reports the best per-call time of ``--repeat`` rounds (rounds are
+  auto-sized to at least ``--min-time`` seconds).
+* ``--save`` writes the results to the baseline file (default
+  ``benchmarks/baseline.json``, machine-specific and not committed).
+* ``--compare`` fails (exit 1) if any case is more than ``--threshold``
+  percent slower than the baseline. Run both sides on the same, otherwise
+  idle machine; sub-100 µs cases easily vary by 20% on shared/virtual CPUs.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.bench_suite --save                  # on main
+    python -m benchmarks.bench_suite --compare --threshold 20  # on the branch
+    python -m benchmarks.bench_suite --only calllist,etag
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import timeit
+from collections import deque
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+from benchmarks.bench_calllist import synthetic_calllist
+from cache_service import CacheJob, CacheService, _compute_etag, cache_service
+from config import settings
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+# --- fixtures -----------------------------------------------------------------
+
+
+def synthetic_events(count: int, span_days: int = 60) -> list[dict]:
+    """``count`` parsed events (``_parse_event`` shape), unsorted, ~20% all-day."""
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    step = timedelta(days=span_days) / max(count, 1)
+    events = []
+    for i in range(count):
+        begin = start + step * ((i * 7919) % count)
+        all_day = i % 5 == 0
+        events.append(
+            {
+                "start": begin.replace(hour=0) if all_day else begin,
+                "end": begin + (timedelta(days=1) if all_day else timedelta(minutes=30 + i % 90)),
+                "title": f"Termin {i}",
+                "all_day": all_day,
+                "calendar": f"Kalender {i % 4}",
+            }
+        )
+    return events
+
+
+def synthetic_onecall(now: float | None = None) -> dict:
+    """OpenWeather One Call 3.0 payload: 48 hourly and 8 daily entries."""
+    now = int(now or time.time())
+    weather = [{"description": "leichter regen", "icon": "10d"}]
+    return {
+        "hourly": [{"dt": now + h * 3600, "temp": 12.5 + h % 7, "weather": weather} for h in range(48)],
+        "daily": [
+            {"dt": now + d * 86400, "temp": {"min": 6.4 + d, "max": 15.6 + d}, "weather": weather} for d in range(8)
+        ],
+    }
+
+
+def _check_size(case: str, actual: int, expected: int) -> None:
+    # Guards against fixtures silently shrinking (day cutoff, row cap).
+    if actual != expected:
+        raise RuntimeError(f"{case}: fixture has {actual} items, expected {expected}")
+
+
+# Covers the default ``synthetic_calllist`` span, so no call is cut off by age.
+_SPAN_DAYS = 365
+
+
+def parse_all(xml_data: bytes, calls: int) -> list[dict]:
+    """Parse every one of ``calls`` synthetic calls (no day cutoff, no row cap)."""
+    from FritzBox.fritzbox_calllist import parse_calllist_xml
+
+    return parse_calllist_xml(xml_data, max_days=_SPAN_DAYS + 1, limit=calls)
+
+
+def grouped_calls_payload(calls: int) -> dict[str, list[dict]]:
+    """``get_calls_grouped``-shaped payload of ``calls`` calls over the last year (datetimes included)."""
+    parsed = parse_all(synthetic_calllist(calls, span_days=_SPAN_DAYS), calls)
+    _check_size("grouped_calls_payload", len(parsed), calls)
+    grouped: dict[str, list[dict]] = {}
+    for call in parsed:
+        grouped.setdefault(call["date"].strftime("%Y-%m-%d"), []).append(call)
+    return grouped
+
+
+class _Sink:
+    """Minimal subscriber: keeps the last messages like a drained SSE queue."""
+
+    __slots__ = ("messages",)
+
+    def __init__(self) -> None:
+        self.messages: deque[dict] = deque(maxlen=100)
+
+    def put_nowait(self, msg: dict) -> None:
+        self.messages.append(msg)
+
+
+# --- cases --------------------------------------------------------------------
+
+
+def _calllist_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    from FritzBox import fritzbox_calllist
+    from FritzBox.fritzbox_calllist import _MAX_CALLS, CallLog, get_calls_grouped
+
+    for calls in (50, 1_000, 10_000):
+        xml_data = synthetic_calllist(calls, span_days=_SPAN_DAYS)
+        _check_size(f"calllist.parse[{calls}]", len(parse_all(xml_data, calls)), calls)
+        yield f"calllist.parse[{calls}]", partial(parse_all, xml_data, calls)
+
+    # Full sync + day grouping as in production: calllist.lua returns 1k calls
+    # within the day window, of which the ring buffer keeps the newest _MAX_CALLS.
+    xml_data = synthetic_calllist(1_000, span_days=settings.fritzbox_calllist_days)
+    log = CallLog()
+
+    def grouped() -> dict[str, list[dict]]:
+        log.last_id = None  # force the full-sync path on every call
+        with (
+            patch.object(fritzbox_calllist, "_call_log", log),
+            patch.object(fritzbox_calllist, "_fetch_calllist", return_value=xml_data),
+        ):
+            return get_calls_grouped("bench", "bench", "192.0.2.1")
+
+    _check_size("calllist.get_calls_grouped", sum(len(day) for day in grouped().values()), _MAX_CALLS)
+    yield f"calllist.get_calls_grouped[xml=1000,keep={_MAX_CALLS}]", grouped
+
+
+def _events_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    from Calendar.get_events import group_events
+
+    events = synthetic_events(10_000)
+    yield "events.group_events[10000]", lambda: group_events(events, max_total=10)
+    yield "events.group_events[10000,all]", lambda: group_events(events, max_total=len(events))
+
+
+def _weather_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    from Weather.weather import daily_from, hourly_from
+
+    data = synthetic_onecall()
+    yield "weather.hourly_from", lambda: hourly_from(data)
+    yield "weather.daily_from", lambda: daily_from(data)
+
+
+def _etag_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    for calls in (1_000, 10_000):
+        payload = grouped_calls_payload(calls)
+        yield f"etag.compute[calls={calls}]", partial(_compute_etag, payload)
+    events = {"data": {"2026-01-01": [{"title": f"Termin {i}", "calendar": "Familie"} for i in range(5_000)]}}
+    yield "etag.compute[events=5000]", lambda: _compute_etag(events)
+
+
+def _import_app():
+    """Import ``app`` without starting the scheduler or loading a snapshot."""
+    settings.cache_snapshot_path = ""
+    settings.cache_shared_store_path = ""
+    cache_service.start = lambda: None
+    import app
+
+    return app
+
+
+def _conditional_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    app = _import_app()
+    payload = grouped_calls_payload(1_000)
+    cache_service._run_job(CacheJob(name="calls", fetch=lambda: payload, interval_seconds=60, view=app._calls_view))
+    etag = cache_service.get("calls").etag
+
+    for label, headers in (
+        ("200", {}),
+        ("200,gzip", {"Accept-Encoding": "gzip"}),
+        ("304", {"If-None-Match": f'"{etag}"'}),
+    ):
+
+        def run(h=headers) -> object:
+            with app.app.test_request_context("/api/calls", headers=h):
+                return app._conditional("calls")
+
+        yield f"http.conditional[{label}]", run
+
+
+def _publish_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    for subscribers in (1, 100, 1_000):
+        svc = CacheService()
+        for _ in range(subscribers):
+            svc.subscribe(_Sink())
+        yield f"sse.publish[{subscribers}]", partial(svc._publish, "calls", "0123456789abcdef")
+
+
+CASES: dict[str, Callable[[], Iterator[tuple[str, Callable[[], object]]]]] = {
+    "calllist": _calllist_cases,
+    "events": _events_cases,
+    "weather": _weather_cases,
+    "etag": _etag_cases,
+    "http": _conditional_cases,
+    "sse": _publish_cases,
+}
+
+
+# --- runner -------------------------------------------------------------------
+
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float) -> float:
+    """Best per-call seconds over ``repeat`` rounds of at least ``min_time`` each."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while (elapsed := timer.timeit(number)) < min_time:
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+    return min([elapsed, *timer.repeat(repeat=repeat - 1, number=number)]) / number
+
+
+def run(groups: list[str], repeat: int, min_time: float) -> dict[str, float]:
+    results: dict[str, float] = {}
+    for group in groups:
+        for name, fn in CASES[group]():
+            gc.collect()
+            results[name] = measure(fn, repeat, min_time)
+            print(f"{name:<44} {results[name] * 1e6:>12.1f} µs", flush=True)
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """Names of cases more than ``threshold`` percent slower than ``baseline``."""
+    return [
+        name
+        for name, seconds in results.items()
+        if name in baseline and seconds > baseline[name] * (1 + threshold / 100)
+    ]
+
+
+def _environment() -> dict[str, str]:
+    return {"python": platform.python_version(), "machine": platform.machine(), "node": platform.node()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", default="", help=f"comma-separated groups ({', '.join(CASES)})")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per round")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="fail if slower than the baseline")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed slowdown in percent")
+    args = parser.parse_args()
+
+    groups = [g for g in args.only.split(",") if g] or list(CASES)
+    unknown = sorted(set(groups) - set(CASES))
+    if unknown:
+        parser.error(f"unknown group(s): {', '.join(unknown)}")
+
+    results = run(groups, args.repeat, args.min_time)
+
+    if args.compare:
+        stored = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if stored.get("environment") != _environment():
+            print(f"warning: baseline recorded on {stored.get('environment')}", file=sys.stderr)
+        baseline = stored["results"]
+        print(f"\n{'case':<44} {'baseline µs':>12} {'now µs':>12} {'change':>8}")
+        for name, seconds in results.items():
+            if name in baseline:
+                change = (seconds / baseline[name] - 1) * 100
+                print(f"{name:<44} {baseline[name] * 1e6:>12.1f} {seconds * 1e6:>12.1f} {change:>+7.1f}%")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nFAIL: >{args.threshold:g}% slower: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+        print(f"\nOK: no case more than {args.threshold:g}% slower")
+
+    if args.save:
+        if args.baseline.exists():
+            stored = json.loads(args.baseline.read_text(encoding="utf-8"))
+            if stored.get("environment") == _environment():
+                # Partial runs (--only) update their cases and keep the rest.
+                results = {**stored["results"], **results}
+        args.baseline.write_text(
+            json.dumps({"environment": _environment(), "results": results}, indent=2) + "\n", encoding="utf-8"
+        )
+        print(f"baseline written to {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
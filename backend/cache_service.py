@@ -2,28 +2,82 @@
 
 * One generic ``CacheJob`` definition replaces three duplicated update loops.
 * ``APScheduler`` drives all background jobs (graceful shutdown, observability).
-* Each cache entry has an ETag (sha256 of the JSON payload). Endpoints can
-  return ``304 Not Modified`` when the client already has the current version.
-* SSE subscribers are notified on every successful change.
+* Each cache entry has an ETag (sha256 of the serialised JSON payload). Endpoints
+  can return ``304 Not Modified`` when the client already has the current version.
+* Response bodies are rendered once per change (``CacheEntry.body``), together
+  with their compressed variants; request handlers only copy the bytes out.
+* SSE subscribers are notified on every successful change. Each change also
+  stores an RFC 6902 patch against the previous version, computed once and
+  shared by all subscribers that opted into inline updates.
+* With a snapshot path configured (``restore``), entries are persisted after
+  every change and served (marked ``stale``) right after a restart, instead of
+  503 until the first upstream fetch.
+* With a ``SharedStore`` attached (``attach_store``), several worker processes
+  share the entries: only the lease holder runs the fetch jobs, everyone else
+  applies its changes and notifies local SSE subscribers.
+* A bounded history of recent bodies per cache lets clients that are a few
+  versions behind fetch a JSON patch (``delta``) instead of the full payload.
+* Adaptive intervals: a job with ``max_interval`` backs off (``backoff``
+  factor) while its result stays identical and snaps back to
+  ``interval_seconds`` after a change; an optional time-of-day ``profile``
+  scales the result.
+* Warm-up: first fetches are spread by ``CacheJob.priority`` (one
+  ``set_warmup`` step per level) plus random ``jitter``, so the cheap,
+  critical caches fill first; ``cold_start_seconds`` measures start until
+  every cache holds freshly fetched data.
+* ``CacheJob.fetch`` may be a coroutine function: it then runs on the shared
+  ``async_engine`` loop (the scheduler thread only schedules it) and is
+  cancelled after ``timeout`` seconds; sync fetchers run as before.
+* Runs are single-flight per cache: ``refresh`` (on-demand), the scheduler
+  and concurrent refresh callers all join the one in-flight run; readers keep
+  getting the previous body until it completes.
+* Isolation: with ``CacheJob.timeout`` a sync fetch runs on the job's own
+  fetch thread and is abandoned at the deadline (no new fetch starts while it
+  is still stuck). Each ``upstream`` has a ``CircuitBreaker``; while it is
+  open, runs are skipped without touching the network.
+* Demand-aware idle mode (``enable_idle``): with no SSE clients and no data
+  requests for a while, every job drops to the idle interval; the next
+  request or stream connect (``note_demand``) refetches everything at once.
 """
 
 from __future__ import annotations
 
+import asyncio
 import contextlib
 import hashlib
+import inspect
 import json
+import math
+import random
+import sqlite3
 import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import UTC, datetime
-from queue import Empty, Queue
-from typing import TYPE_CHECKING, Any
+from datetime import UTC, datetime, timedelta
+from queue import Empty, Full, Queue
+from typing import TYPE_CHECKING, Any, Protocol
+from zoneinfo import ZoneInfo
 
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
 
+import cache_snapshot
+import metrics
+from async_engine import engine
+from circuit_breaker import CircuitBreaker
+from compression import compress_variants
+from config import settings
+from json_patch import make_patch
 from logging_config import get_logger
+from profiling import profiler
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from pathlib import Path
+
+    from shared_store import SharedStore
 
 logger = get_logger(__name__)
 
@@ -34,9 +88,63 @@ def _default_serialiser(obj: Any) -> Any:
     raise TypeError(f"Type {type(obj).__name__} not JSON serialisable")
 
 
+def _serialise(payload: Any) -> bytes:
+    """Serialise ``payload`` to the exact bytes sent on the wire.
+
+    Key order is preserved (no ``sort_keys``): fetchers return deterministically
+    ordered dicts and the frontend relies on that order (e.g. calls newest-first).
+    """
+    return json.dumps(payload, default=_default_serialiser, ensure_ascii=False).encode("utf-8")
+
+
+def _etag_for(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
 def _compute_etag(payload: Any) -> str:
-    raw = json.dumps(payload, sort_keys=True, default=_default_serialiser, ensure_ascii=False)
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+    return _etag_for(_serialise(payload))
+
+
+# Fields replicated to other workers through the shared store.
+_SHARED_FIELDS = ("data", "etag", "body", "variants", "patch", "base_etag", "updated_at", "checked_at")
+
+
+def _render_patch(old_body: bytes, new_body: bytes) -> bytes:
+    """Serialised patch from ``old_body`` to ``new_body``; empty if not worth it."""
+    if not old_body:
+        return b""
+    patch = _serialise(make_patch(json.loads(old_body), json.loads(new_body)))
+    return patch if len(patch) < len(new_body) else b""
+
+
+class UnknownCacheError(KeyError):
+    """No job is registered under the requested cache name."""
+
+
+class RefreshRateLimitedError(RuntimeError):
+    """``CacheService.refresh`` was called again too soon."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"refresh of '{name}' rate limited, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class RefreshForwardedError(TimeoutError):
+    """``CacheService.refresh`` on a follower: the leader will run it."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(f"refresh of '{name}' forwarded to the leader worker")
+
+
+class Subscriber(Protocol):
+    """Anything ``_publish`` can push to: a ``Queue`` or a shared broadcaster.
+
+    ``put_nowait`` must not block. It may raise ``queue.Full``; a full
+    ``Queue`` loses its oldest message, other subscribers handle their own
+    overflow.
+    """
+
+    def put_nowait(self, item: Any, /) -> None: ...
 
 
 @dataclass
@@ -44,45 +152,240 @@ class CacheEntry:
     name: str
     data: Any = None
     etag: str = ""
+    body: bytes = b""
+    variants: dict[str, bytes] = field(default_factory=dict)
+    # JSON patch (serialised) turning the ``base_etag`` body into ``body``.
+    patch: bytes = b""
+    base_etag: str = ""
+    # Recent ``(etag, body)`` pairs, oldest first (bounded, see ``CacheService``).
+    history: deque[tuple[str, bytes]] = field(default_factory=deque)
+    # Memoised patches ``{old_etag: patch}`` towards the current body.
+    deltas: dict[str, bytes] = field(default_factory=dict)
     updated_at: datetime | None = None
+    # Last successful fetch, changed or not.
+    checked_at: datetime | None = None
     last_error: str | None = None
+    # Restored from the on-disk snapshot and not yet confirmed by a fetch.
+    stale: bool = False
+    # Current scheduling interval and why (see ``CacheJob.max_interval``).
+    interval: int = 0
+    interval_reason: str = ""
 
 
 @dataclass
 class CacheJob:
-    """Definition of a single periodic cache refresh."""
+    """Definition of a single periodic cache refresh.
+
+    ``view`` shapes the endpoint response from ``(data, etag)``; it runs once per
+    change and its serialised result is stored as ``CacheEntry.body``. Without a
+    view the body is the serialised data itself.
+
+    With ``max_interval`` above ``interval_seconds`` the interval adapts between
+    the two. ``profile`` maps local time (``TIMEZONE``) to an interval multiplier (e.g. quiet
+    hours at night). The first fetch waits ``initial_delay`` plus ``priority``
+    warm-up steps plus up to ``jitter`` seconds.
+    """
 
     name: str
     fetch: Callable[[], Any]
     interval_seconds: int
     initial_delay: int = 0
     error_value: Any = field(default_factory=dict)
+    view: Callable[[Any, str], Any] | None = None
+    max_interval: int = 0
+    backoff: float = 1.5
+    profile: Callable[[datetime], float] | None = None
+    # Warm-up order (lower runs first) and random spread of the first fetch.
+    priority: int = 0
+    jitter: float = 0.0
+    # Hard fetch deadline in seconds (None = no limit): async fetchers are
+    # cancelled, sync ones abandoned on their own fetch thread.
+    timeout: float | None = None
+    # Circuit breaker key; jobs hitting the same service share one (default: name).
+    upstream: str | None = None
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.fetch)
+
+    @property
+    def adaptive(self) -> bool:
+        return self.max_interval > self.interval_seconds or self.profile is not None
+
+
+def time_of_day_profile(start_hour: int, end_hour: int, factor: float) -> Callable[[datetime], float]:
+    """``factor`` between ``start_hour`` and ``end_hour`` (may wrap midnight), else 1."""
+
+    def profile(now: datetime) -> float:
+        hour = now.hour
+        quiet = start_hour <= hour < end_hour if start_hour <= end_hour else hour >= start_hour or hour < end_hour
+        return factor if quiet else 1.0
+
+    return profile
 
 
 class CacheService:
     """Thread-safe cache store with pub/sub and APScheduler integration."""
 
-    def __init__(self) -> None:
+    def __init__(self, history_size: int = 8) -> None:
+        self._history_size = history_size
         self._entries: dict[str, CacheEntry] = {}
         self._lock = threading.RLock()
         self._scheduler = BackgroundScheduler(daemon=True)
-        self._subscribers: list[Queue] = []
+        self._subscribers: list[Subscriber] = []
         self._sub_lock = threading.Lock()
+        self._snapshot_path: Path | None = None
+        self._snapshot_lock = threading.Lock()
+        self._store: SharedStore | None = None
+        self._store_version = 0
+        self._is_leader = True
+        self._leadership_callbacks: list[Callable[[bool], None]] = []
+        # Adaptive interval per job before the time-of-day profile is applied.
+        self._base_intervals: dict[str, int] = {}
+        self._jobs: dict[str, CacheJob] = {}
+        self._in_flight: dict[str, Future] = {}
+        self._flight_lock = threading.Lock()
+        self._refreshed_at: dict[str, float] = {}
+        self._fetch_pools: dict[str, ThreadPoolExecutor] = {}
+        # Sync runs started outside the scheduler (manual/forwarded refreshes).
+        self._run_pool = ThreadPoolExecutor(4, thread_name_prefix="refresh")
+        self._fetches: dict[str, Future] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._breaker_failures = 5
+        self._breaker_reset = 60.0
+        self._idle_after = 0.0
+        self._idle_interval = 0
+        self._idle = False
+        self._last_demand = time.monotonic()
+        self._warmup_step = 0.0
+        self._started_at: float | None = None
+        self._cold_start: float | None = None
 
     # -- public API --------------------------------------------------------
 
+    def restore(self, path: Path) -> int:
+        """Load entries from the snapshot at ``path`` and persist future changes there.
+
+        Call before ``register`` so jobs can skip an immediate refetch when the
+        snapshot is younger than their interval. Returns the number of restored
+        entries.
+        """
+        self._snapshot_path = path
+        restored = cache_snapshot.load(path)
+        with self._lock:
+            for name, fields in restored.items():
+                entry = CacheEntry(name=name, history=deque(maxlen=self._history_size), stale=True, **fields)
+                if entry.etag:
+                    entry.history.append((entry.etag, entry.body))
+                self._entries[name] = entry
+        if restored:
+            logger.info("Restored %d cache entries from %s", len(restored), path)
+        return len(restored)
+
+    def attach_store(self, store: SharedStore, poll_seconds: float = 1.0) -> None:
+        """Share entries with other worker processes through ``store``.
+
+        Call before ``start``. A periodic sync job renews (or takes over) the
+        scheduler lease and applies changes written by the other workers.
+        """
+        self._store = store
+        self._is_leader = store.acquire_lease()
+        self._sync_from_store()
+        self._scheduler.add_job(
+            self._sync,
+            trigger="interval",
+            seconds=poll_seconds,
+            id="cache-sync",
+            max_instances=1,
+            coalesce=True,
+        )
+        logger.info("Shared cache store %s attached (leader=%s)", store.path, self._is_leader)
+
+    def enable_idle(self, after_seconds: float, interval: int) -> None:
+        """Slow every job to ``interval`` after ``after_seconds`` without demand.
+
+        Demand is any connected subscriber client or a ``note_demand`` call.
+        Not used with a shared store: demand is only visible per process.
+        """
+        self._idle_after = after_seconds
+        self._idle_interval = interval
+
+    def note_demand(self) -> None:
+        """Record a client request; leaving idle mode refetches every cache now."""
+        self._last_demand = time.monotonic()
+        if not self._idle:
+            return
+        with self._lock:
+            if not self._idle:
+                return
+            self._idle = False
+            jobs = list(self._jobs.values())
+            for job in jobs:
+                entry = self._entries[job.name]
+                entry.interval = self._base_intervals.get(job.name, job.interval_seconds)
+                entry.interval_reason = "demand resumed"
+        logger.info("Client demand resumed; refreshing all caches")
+        for job in jobs:
+            with contextlib.suppress(JobLookupError):
+                self._scheduler.reschedule_job(job.name, trigger="interval", seconds=self._entries[job.name].interval)
+                self.trigger(job.name)
+
+    def set_circuit_breaker(self, failure_threshold: int, reset_timeout: float) -> None:
+        """Open an upstream's breaker after ``failure_threshold`` consecutive failures."""
+        self._breaker_failures = failure_threshold
+        self._breaker_reset = reset_timeout
+
+    def set_warmup(self, step_seconds: float) -> None:
+        """Delay first fetches by ``step_seconds`` per ``CacheJob.priority`` level."""
+        self._warmup_step = step_seconds
+
+    @property
+    def running(self) -> bool:
+        return self._scheduler.running
+
+    @property
+    def cold_start_seconds(self) -> float | None:
+        """Seconds from ``start`` until every cache had a fresh fetch (None while warming)."""
+        return self._cold_start
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process runs the fetch jobs (always true without a store)."""
+        return self._store is None or self._is_leader
+
+    def on_leadership_change(self, callback: Callable[[bool], None]) -> None:
+        """Call ``callback(is_leader)`` now and whenever this process gains or loses the lease."""
+        self._leadership_callbacks.append(callback)
+        callback(self.is_leader)
+
     def register(self, job: CacheJob) -> None:
         with self._lock:
-            self._entries.setdefault(job.name, CacheEntry(name=job.name, data=job.error_value))
+            entry = self._entries.setdefault(
+                job.name,
+                CacheEntry(name=job.name, data=job.error_value, history=deque(maxlen=self._history_size)),
+            )
+            checked_at = entry.checked_at
+            entry.interval = job.interval_seconds
+            entry.interval_reason = "initial"
+            self._base_intervals[job.name] = job.interval_seconds
+            self._jobs[job.name] = job
 
         def _runner() -> None:
-            self._run_job(job)
+            if self.is_leader:
+                self._run_once(job)
+
+        now = datetime.now(UTC)
+        delay = job.initial_delay + job.priority * self._warmup_step + random.uniform(0, job.jitter)
+        next_run_time = now + timedelta(seconds=delay)
+        if checked_at and now - checked_at < timedelta(seconds=job.interval_seconds):
+            next_run_time = checked_at + timedelta(seconds=job.interval_seconds)
+            logger.info("Cache '%s' snapshot is fresh; first fetch at %s", job.name, next_run_time.isoformat())
 
         self._scheduler.add_job(
             _runner,
             trigger="interval",
             seconds=job.interval_seconds,
-            next_run_time=datetime.now(UTC),
+            next_run_time=next_run_time,
             id=job.name,
             max_instances=1,
             coalesce=True,
@@ -91,17 +394,79 @@ class CacheService:
 
     def start(self) -> None:
         if not self._scheduler.running:
+            self._started_at = time.monotonic()
             self._scheduler.start()
             logger.info("CacheService started (%d jobs)", len(self._scheduler.get_jobs()))
 
     def shutdown(self) -> None:
         if self._scheduler.running:
             self._scheduler.shutdown(wait=False)
+        engine.stop()
+        self._run_pool.shutdown(wait=False, cancel_futures=True)
+        for pool in self._fetch_pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        if self._store is not None and self._is_leader:
+            with contextlib.suppress(sqlite3.Error):
+                self._store.release_lease()
+
+    def trigger(self, name: str) -> None:
+        """Run job ``name`` as soon as possible; its interval restarts from then."""
+        self._scheduler.modify_job(name, next_run_time=datetime.now(UTC))
+
+    def refresh(self, name: str, timeout: float | None = None, min_interval: float = 0.0) -> str:
+        """Fetch cache ``name`` now and return its (possibly unchanged) ETag.
+
+        Joins a run already in flight instead of starting another one. A new
+        run within ``min_interval`` seconds of the previous refresh raises
+        ``RefreshRateLimitedError``; ``TimeoutError`` after ``timeout`` seconds
+        (the run itself continues). A follower worker forwards the refresh to
+        the leader through the shared store and raises
+        ``RefreshForwardedError`` (a ``TimeoutError``) right away; the result
+        arrives with the next store sync. Raises ``UnknownCacheError`` (a
+        ``KeyError``) for unknown caches.
+        """
+        job = self._jobs.get(name)
+        if job is None:
+            raise UnknownCacheError(name)
+        with self._flight_lock:
+            running = self._in_flight.get(name)
+            if running is None or running.done():
+                now = time.monotonic()
+                wait = self._refreshed_at.get(name, -math.inf) + min_interval - now
+                if wait > 0:
+                    raise RefreshRateLimitedError(name, wait)
+                self._refreshed_at[name] = now
+        if self._store is not None and not self.is_leader:
+            self._store.request_refresh(name)
+            raise RefreshForwardedError(name)
+        self._run_once(job, inline=False).result(timeout)
+        return self.get(name).etag
 
     def get(self, name: str) -> CacheEntry:
         with self._lock:
             return self._entries[name]
 
+    def delta(self, name: str, since: str) -> bytes | None:
+        """Serialised JSON patch from version ``since`` to the current body.
+
+        Returns ``None`` when ``since`` is unknown, already evicted from the
+        history, or when the patch would not be smaller than the full body.
+        Patches are computed at most once per ``(since, current)`` pair.
+        """
+        with self._lock:
+            entry = self._entries[name]
+            etag, body = entry.etag, entry.body
+            if since in entry.deltas:
+                return entry.deltas[since] or None
+            old_body = next((b for e, b in entry.history if e == since and e != etag), None)
+        if old_body is None:
+            return None
+        patch = _render_patch(old_body, body)
+        with self._lock:
+            if entry.etag == etag:
+                entry.deltas[since] = patch
+        return patch or None
+
     def snapshot(self) -> dict[str, dict]:
         """Lightweight overview for /api/health."""
         with self._lock:
@@ -111,15 +476,24 @@ class CacheService:
                     "updated_at": e.updated_at.isoformat() if e.updated_at else None,
                     "last_error": e.last_error,
                     "has_data": bool(e.data),
+                    "stale": e.stale,
+                    "ready": bool(e.etag),
+                    "interval": e.interval,
+                    "interval_reason": e.interval_reason,
+                    "circuit": self._breaker(name).snapshot() if name in self._jobs else None,
                 }
                 for name, e in self._entries.items()
             }
 
     # -- pub/sub for SSE ---------------------------------------------------
 
-    def subscribe(self) -> Queue:
-        q: Queue = Queue(maxsize=100)
+    def subscribe(self, q: Subscriber | None = None) -> Subscriber:
+        """Register ``q`` (default: a fresh bounded ``Queue``) for change messages."""
+        if q is None:
+            q = Queue(maxsize=100)
         with self._sub_lock:
+            if q in self._subscribers:
+                return q
             self._subscribers.append(q)
         # Kick-off snapshot of current versions
         with self._lock:
@@ -129,48 +503,314 @@ class CacheService:
                         q.put_nowait({"name": entry.name, "etag": entry.etag})
         return q
 
-    def unsubscribe(self, q: Queue) -> None:
+    def unsubscribe(self, q: Subscriber) -> None:
         with self._sub_lock:
             if q in self._subscribers:
                 self._subscribers.remove(q)
 
+    def _note_warm(self) -> None:
+        if self._cold_start is not None or self._started_at is None:
+            return
+        with self._lock:
+            if self._cold_start is not None or not all(e.checked_at and not e.stale for e in self._entries.values()):
+                return
+            self._cold_start = time.monotonic() - self._started_at
+        logger.info("All caches warm after %.1fs", self._cold_start)
+
+    def _client_count(self) -> int:
+        # The SSE broadcaster is one subscriber fanning out to many clients.
+        with self._sub_lock:
+            return sum(getattr(q, "client_count", 1) for q in self._subscribers)
+
+    def queue_depth(self) -> int:
+        """Messages waiting in plain queue subscribers (the broadcaster has none)."""
+        with self._sub_lock:
+            return sum(q.qsize() for q in self._subscribers if hasattr(q, "qsize"))
+
+    def _is_idle(self) -> bool:
+        if not self._idle_after or self._store is not None:
+            return False
+        if self._client_count() or time.monotonic() - self._last_demand < self._idle_after:
+            return False
+        if not self._idle:
+            logger.info("No clients for %ss; caches switch to idle interval", int(self._idle_after))
+        self._idle = True
+        return True
+
     def _publish(self, name: str, etag: str) -> None:
         msg = {"name": name, "etag": etag}
+        # Subscribers may call back into the service (the broadcaster looks the
+        # entry up under _lock), so never call them while holding _sub_lock.
         with self._sub_lock:
-            for q in list(self._subscribers):
-                try:
-                    q.put_nowait(msg)
-                except Exception:
-                    # Drop slow subscribers
-                    try:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(msg)
+            except Full:
+                metrics.PUBLISH_DROPPED.inc()
+                if isinstance(q, Queue):
+                    # Slow queue subscriber: drop its oldest message instead.
+                    with contextlib.suppress(Empty, Full):
                         q.get_nowait()
                         q.put_nowait(msg)
-                    except Empty:
-                        pass
 
     # -- internal ----------------------------------------------------------
 
-    def _run_job(self, job: CacheJob) -> None:
+    def _run_once(self, job: CacheJob, inline: bool = True) -> Future:
+        """Start a run of ``job`` unless one is in flight; returns that run.
+
+        Sync jobs run in the calling thread when ``inline`` (the future is done
+        on return for the caller that started it), else on the refresh pool so
+        the caller can wait with a timeout; async jobs are handed to the event
+        loop.
+        """
+        with self._flight_lock:
+            current = self._in_flight.get(job.name)
+            if current is not None and not current.done():
+                return current
+            if job.is_async:
+                current = engine.spawn(self._run_async_job(job))
+                self._in_flight[job.name] = current
+                return current
+            if not inline:
+                current = self._in_flight[job.name] = self._run_pool.submit(self._run_job, job)
+                return current
+            current = Future()
+            self._in_flight[job.name] = current
         try:
-            data = job.fetch()
-        except Exception as exc:
-            logger.warning("Cache job '%s' failed: %s", job.name, exc)
-            with self._lock:
-                self._entries[job.name].last_error = str(exc)
+            self._run_job(job)
+        finally:
+            current.set_result(None)
+        return current
+
+    def _run_job(self, job: CacheJob) -> None:
+        if job.is_async:
+            engine.run(self._run_async_job(job))
+            return
+        if not self._breaker(job.name).allow():
+            metrics.JOB_SKIPPED.labels(job.name).inc()
             return
+        with profiler.capture("job", job.name):
+            try:
+                with metrics.JOB_PHASE_SECONDS.labels(job.name, "fetch").time():
+                    data = self._fetch_sync(job)
+            except Exception as exc:
+                self._record_failure(job, exc)
+                return
+            self._breaker(job.name).record_success()
+            self._store_result(job, data)
+
+    async def _run_async_job(self, job: CacheJob) -> None:
+        if not self._breaker(job.name).allow():
+            metrics.JOB_SKIPPED.labels(job.name).inc()
+            return
+        with profiler.capture("job", job.name):
+            try:
+                with metrics.JOB_PHASE_SECONDS.labels(job.name, "fetch").time():
+                    data = await asyncio.wait_for(job.fetch(), job.timeout)
+            except TimeoutError:
+                self._record_failure(job, TimeoutError(f"fetch cancelled after {job.timeout}s"))
+                return
+            except Exception as exc:
+                self._record_failure(job, exc)
+                return
+            self._breaker(job.name).record_success()
+            # Rendering, compression and snapshot I/O stay off the event loop.
+            await asyncio.to_thread(profiler.bind(self._store_result), job, data)
 
-        new_etag = _compute_etag(data)
+    def _breaker(self, name: str) -> CircuitBreaker:
+        job = self._jobs.get(name)
+        upstream = (job.upstream if job else None) or name
+        with self._lock:
+            breaker = self._breakers.get(upstream)
+            if breaker is None:
+                breaker = self._breakers[upstream] = CircuitBreaker(
+                    upstream, self._breaker_failures, self._breaker_reset
+                )
+            return breaker
+
+    def _fetch_sync(self, job: CacheJob) -> Any:
+        """``job.fetch()``, on the job's own thread when it has a deadline."""
+        if job.timeout is None:
+            return job.fetch()
+        with self._flight_lock:
+            previous = self._fetches.get(job.name)
+            if previous is not None and not previous.done():
+                raise TimeoutError(f"previous fetch still running after {job.timeout}s deadline")
+            pool = self._fetch_pools.get(job.name)
+            if pool is None:
+                pool = self._fetch_pools[job.name] = ThreadPoolExecutor(1, thread_name_prefix=f"fetch-{job.name}")
+            future = self._fetches[job.name] = pool.submit(profiler.bind(job.fetch))
+        try:
+            return future.result(job.timeout)
+        except TimeoutError:
+            raise TimeoutError(f"fetch abandoned after {job.timeout}s") from None
+
+    def _record_failure(self, job: CacheJob, exc: Exception) -> None:
+        breaker = self._breaker(job.name)
+        breaker.record_failure()
+        metrics.JOB_ERRORS.labels(job.name).inc()
+        logger.warning("Cache job '%s' failed: %s (circuit %s)", job.name, exc, breaker.state)
+        with self._lock:
+            self._entries[job.name].last_error = str(exc)
+
+    def _store_result(self, job: CacheJob, data: Any) -> None:
+        """Serialise ``data``; on a new ETag render, store and publish it."""
+        with metrics.JOB_PHASE_SECONDS.labels(job.name, "etag").time():
+            raw = _serialise(data)
+            new_etag = _etag_for(raw)
+        now = datetime.now(UTC)
         with self._lock:
             entry = self._entries[job.name]
-            if entry.etag == new_etag:
+            entry.checked_at = now
+            entry.stale = False
+            unchanged = entry.etag == new_etag
+            if unchanged:
                 entry.last_error = None
-                return
+            old_body, old_etag = entry.body, entry.etag
+        if unchanged:
+            # Outside _lock: the idle check takes _sub_lock (lock order, see _publish).
+            self._adapt_interval(job, changed=False)
+            self._note_warm()
+            return
+        with metrics.JOB_PHASE_SECONDS.labels(job.name, "transform").time():
+            body = raw if job.view is None else _serialise(job.view(data, new_etag))
+            variants = compress_variants(body)
+            patch = _render_patch(old_body, body)
+        with self._lock:
             entry.data = data
             entry.etag = new_etag
-            entry.updated_at = datetime.now(UTC)
+            entry.body = body
+            entry.variants = variants
+            entry.patch = patch
+            entry.base_etag = old_etag if patch else ""
+            entry.history.append((new_etag, body))
+            entry.deltas = {old_etag: patch} if old_etag else {}
+            entry.updated_at = now
             entry.last_error = None
         logger.info("Cache '%s' updated (etag=%s)", job.name, new_etag)
-        self._publish(job.name, new_etag)
+        metrics.ETAG_CHANGES.labels(job.name).inc()
+        self._adapt_interval(job, changed=True)
+        self._note_warm()
+        with metrics.JOB_PHASE_SECONDS.labels(job.name, "publish").time():
+            self._publish(job.name, new_etag)
+            self._save_snapshot()
+            self._write_shared(job.name)
+
+    def _adapt_interval(self, job: CacheJob, changed: bool) -> None:
+        """Back off while unchanged, tighten after a change, apply the profile.
+
+        In idle mode the idle interval wins (adaptive state keeps evolving).
+        """
+        idle = self._is_idle()
+        if not (job.adaptive or idle):
+            return
+        low = job.interval_seconds
+        high = max(job.max_interval, low)
+        with self._lock:
+            current = self._base_intervals.get(job.name, low)
+            if not job.adaptive:
+                base, reason = low, "fixed"
+            elif changed:
+                base, reason = low, "changed"
+            else:
+                base = min(high, math.ceil(current * job.backoff))
+                reason = "unchanged, at max" if base == high else "unchanged, backing off"
+            self._base_intervals[job.name] = base
+            factor = job.profile(datetime.now(ZoneInfo(settings.timezone))) if job.profile else 1.0
+            if factor != 1.0:
+                reason += f", time-of-day x{factor:g}"
+            interval = max(1, round(base * factor))
+            if idle:
+                interval, reason = max(interval, self._idle_interval), "idle: no clients"
+            entry = self._entries[job.name]
+            rescheduled = interval != entry.interval
+            entry.interval, entry.interval_reason = interval, reason
+        if rescheduled:
+            logger.info("Cache '%s' interval now %ss (%s)", job.name, interval, reason)
+            # Not scheduled when _run_job is called directly (tests, manual refresh).
+            with contextlib.suppress(JobLookupError):
+                self._scheduler.reschedule_job(job.name, trigger="interval", seconds=interval)
+
+    def _save_snapshot(self) -> None:
+        if self._snapshot_path is None:
+            return
+        # Serialise writers so an older copy never replaces a newer one.
+        with self._snapshot_lock:
+            with self._lock:
+                entries = {
+                    name: {key: getattr(e, key) for key in cache_snapshot.FIELDS}
+                    for name, e in self._entries.items()
+                    if e.etag
+                }
+            try:
+                cache_snapshot.save(self._snapshot_path, entries)
+            except OSError as exc:
+                logger.warning("Could not write cache snapshot %s: %s", self._snapshot_path, exc)
+
+    # -- shared store (multi-worker) ---------------------------------------
+
+    def _write_shared(self, name: str) -> None:
+        if self._store is None:
+            return
+        with self._lock:
+            entry = self._entries[name]
+            fields = {key: getattr(entry, key) for key in _SHARED_FIELDS}
+        try:
+            self._store_version = max(self._store_version, self._store.write(name, fields))
+        except sqlite3.Error as exc:
+            logger.warning("Could not write '%s' to shared store: %s", name, exc)
+
+    def _sync(self) -> None:
+        if self._store is None:
+            return
+        try:
+            leader = self._store.acquire_lease()
+            changed = leader != self._is_leader
+            self._is_leader = leader
+            if changed:
+                logger.info("Scheduler lease %s", "acquired" if leader else "lost")
+                for callback in self._leadership_callbacks:
+                    try:
+                        callback(leader)
+                    except Exception:
+                        logger.exception("Leadership callback %r failed", callback)
+            if leader:
+                for name in self._store.take_refresh_requests():
+                    if name in self._jobs:
+                        self._run_once(self._jobs[name], inline=False)
+            self._sync_from_store()
+        except sqlite3.Error as exc:
+            logger.warning("Shared store sync failed: %s", exc)
+
+    def _sync_from_store(self) -> None:
+        store = self._store
+        if store is None:
+            return
+        for version, name, writer, fields in store.changes_since(self._store_version):
+            self._store_version = version
+            if writer != store.holder_id:
+                self._apply_shared(name, fields)
+
+    def _apply_shared(self, name: str, fields: dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = CacheEntry(name=name, history=deque(maxlen=self._history_size))
+            changed = entry.etag != fields["etag"]
+            for key, value in fields.items():
+                setattr(entry, key, value)
+            entry.stale = False
+            entry.last_error = None
+            if changed:
+                entry.history.append((entry.etag, entry.body))
+                entry.deltas = {entry.base_etag: entry.patch} if entry.patch else {}
+        if changed:
+            self._publish(name, fields["etag"])
 
 
 cache_service = CacheService()
+metrics.watch("hic_subscriber_queue_depth", "Messages queued for subscribers", cache_service.queue_depth)
+metrics.watch(
+    "hic_cold_start_seconds", "Start until every cache was fetched", lambda: cache_service.cold_start_seconds or 0
+)
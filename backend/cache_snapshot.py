@@ -0,0 +1,60 @@
+"""On-disk cache snapshot for warm restarts.
+
+* Written atomically (temp file + ``os.replace``) after every cache change, so
+  a crash mid-write never leaves a truncated snapshot behind.
+* Pickle keeps bytes and datetimes intact and loads in well under a
+  millisecond. The file is local and only written by this process (same trust
+  level as ``token.pickle``).
+* Unknown versions or unreadable files are ignored; the caches then simply
+  start cold.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_VERSION = 1
+FIELDS = ("data", "etag", "body", "variants", "updated_at", "checked_at")
+
+
+def save(path: Path, entries: dict[str, dict[str, Any]]) -> None:
+    """Atomically write ``{name: {field: value}}`` to ``path``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    tmp = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump({"version": SNAPSHOT_VERSION, "entries": entries}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            fh.flush()
+            os.fsync(fh.fileno())
+        tmp.replace(path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def load(path: Path) -> dict[str, dict[str, Any]]:
+    """Return the stored entries, or ``{}`` when there is no usable snapshot."""
+    if not path.exists():
+        return {}
+    try:
+        with path.open("rb") as fh:
+            snapshot = pickle.load(fh)
+    except Exception as exc:
+        logger.warning("Ignoring unreadable cache snapshot %s: %s", path, exc)
+        return {}
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        logger.warning("Ignoring cache snapshot %s with unknown format", path)
+        return {}
+    return {
+        name: {key: fields[key] for key in FIELDS if key in fields}
+        for name, fields in snapshot.get("entries", {}).items()
+    }
@@ -7,12 +7,20 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from pydantic import Field, field_validator
+from pydantic import BaseModel, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = Path(__file__).resolve().parent
 
 
+class WeatherLocation(BaseModel):
+    """One forecast location (``WEATHER_LOCATIONS`` entry)."""
+
+    name: str
+    lat: float
+    lon: float
+
+
 class Settings(BaseSettings):
     """Typed application settings.
 
@@ -31,21 +39,81 @@ class Settings(BaseSettings):
     fritzbox_password: str | None = Field(default=None)
     fritzbox_ip_address: str | None = Field(default=None)
     fritzbox_calllist_days: int = Field(default=4, ge=1, le=365)
+    # Calls are polled incrementally; a full list refresh runs this often
+    fritzbox_full_resync_minutes: int = Field(default=60, ge=1)
+    # Refresh calls on call monitor events (enable on the box with #96*5*)
+    fritzbox_call_monitor: bool = Field(default=False)
+    fritzbox_call_monitor_port: int = Field(default=1012, ge=1, le=65535)
+    # The box writes the call list shortly after DISCONNECT
+    fritzbox_call_monitor_delay: float = Field(default=2.0, ge=0)
 
     # Google Calendar
     google_calendar_client_secret_path: str = Field(default="config/client_secret.json")
     google_calendar_token_path: str = Field(default="config/token.pickle")
     google_calendar_config_path: str = Field(default="config/calendars.json")
+    calendar_fetch_concurrency: int = Field(default=4, ge=1, le=32)
+    calendar_refresh_deadline: int = Field(default=45, ge=5)
+    calendar_sync_window_days: int = Field(default=60, ge=1, le=365)
+    calendar_full_resync_hours: int = Field(default=24, ge=1)
 
     # OpenWeather
     openweather_api_key: str | None = Field(default=None)
     weather_location_lat: float = Field(default=48.137)
     weather_location_lon: float = Field(default=11.575)
+    # Additional/explicit locations as JSON list of {name, lat, lon}; the first
+    # one is the primary location. Empty = weather_location_lat/lon only.
+    weather_locations: list[WeatherLocation] = Field(default_factory=list)
+    # Reuse window for the raw One-Call response (keep below interval_weather)
+    weather_raw_ttl: int = Field(default=60, ge=0)
+    # OpenWeather request budget (free tier: 1000 One-Call requests per day)
+    weather_daily_budget: int = Field(default=1000, ge=1)
+    weather_minute_budget: int = Field(default=60, ge=1)
 
     # Update intervals (seconds)
     interval_calendar: int = Field(default=300, ge=30)
     interval_calls: int = Field(default=120, ge=30)
     interval_weather: int = Field(default=600, ge=60)
+    # Adaptive intervals: back off up to *_max while nothing changes
+    # (0 = fixed interval), by ``interval_backoff`` per unchanged fetch
+    interval_calendar_max: int = Field(default=1800, ge=0)
+    interval_calls_max: int = Field(default=0, ge=0)
+    interval_weather_max: int = Field(default=1800, ge=0)
+    interval_backoff: float = Field(default=1.5, ge=1.0)
+    # Time-of-day profile: intervals are multiplied by quiet_hours_factor
+    # during quiet_hours ("START-END" in local hours, e.g. "0-6"; empty = off)
+    quiet_hours: str = Field(default="")
+    quiet_hours_factor: float = Field(default=4.0, ge=1.0)
+    # Idle mode: without SSE clients and data requests for idle_after_minutes
+    # all jobs run every idle_interval seconds (0 = off)
+    idle_after_minutes: int = Field(default=15, ge=0)
+    idle_interval: int = Field(default=1800, ge=60)
+    # POST /api/refresh/<name>: min. seconds between refreshes per cache and
+    # how long the request waits for the result
+    refresh_min_interval: int = Field(default=10, ge=0)
+    refresh_timeout_seconds: int = Field(default=30, ge=1)
+    # Hard deadline per fetch (async: cancelled, sync: abandoned)
+    fetch_timeout_seconds: int = Field(default=120, ge=5)
+    # Circuit breaker per upstream: open after N consecutive failures, probe
+    # again after circuit_reset_seconds (doubling while the probe fails)
+    circuit_failure_threshold: int = Field(default=5, ge=1)
+    circuit_reset_seconds: int = Field(default=60, ge=1)
+    # Startup: seconds between warm-up priority levels, random spread per job
+    warmup_step_seconds: float = Field(default=3.0, ge=0)
+    warmup_jitter_seconds: float = Field(default=2.0, ge=0)
+    # Debug endpoints (/api/debug/*) require "Authorization: Bearer <token>";
+    # empty = disabled. profile_keep: captures kept per job/endpoint
+    debug_token: str = Field(default="")
+    profile_keep: int = Field(default=5, ge=1, le=50)
+
+    # Cache snapshot for warm restarts (empty = disabled)
+    cache_snapshot_path: str = Field(default="config/cache_snapshot.pickle")
+
+    # Multi-worker: shared SQLite store + scheduler lease (empty = single process)
+    cache_shared_store_path: str = Field(default="")
+    cache_lease_seconds: int = Field(default=15, ge=3, le=300)
+
+    # Server-Sent Events: heartbeat interval, also bounds dead-client detection
+    sse_heartbeat_seconds: int = Field(default=15, ge=1, le=60)
 
     # Timezone & locale
     timezone: str = Field(default="Europe/Berlin")
@@ -66,6 +134,23 @@ class Settings(BaseSettings):
     def _upper_log_level(cls, v: str) -> str:
         return v.upper()
 
+    @field_validator("quiet_hours")
+    @classmethod
+    def _check_quiet_hours(cls, v: str) -> str:
+        v = v.strip()
+        if v:
+            start, _, end = v.partition("-")
+            if not (start.isdigit() and end.isdigit() and int(start) < 24 and int(end) <= 24):
+                raise ValueError("quiet_hours must look like '0-6' (local hours)")
+        return v
+
+    @property
+    def quiet_hours_range(self) -> tuple[int, int] | None:
+        if not self.quiet_hours:
+            return None
+        start, _, end = self.quiet_hours.partition("-")
+        return int(start), int(end)
+
     def absolute_path(self, relative: str) -> Path:
         """Resolve a path relative to backend directory."""
         p = Path(relative)
@@ -73,6 +158,12 @@ class Settings(BaseSettings):
             return p
         return (BASE_DIR / p).resolve()
 
+    @property
+    def weather_location_list(self) -> list[WeatherLocation]:
+        if self.weather_locations:
+            return self.weather_locations
+        return [WeatherLocation(name="default", lat=self.weather_location_lat, lon=self.weather_location_lon)]
+
     @property
     def calendar_config_path(self) -> Path:
         return self.absolute_path(self.google_calendar_config_path)
@@ -85,5 +176,13 @@ class Settings(BaseSettings):
     def calendar_client_secret_path(self) -> Path:
         return self.absolute_path(self.google_calendar_client_secret_path)
 
+    @property
+    def cache_shared_store_file(self) -> Path | None:
+        return self.absolute_path(self.cache_shared_store_path) if self.cache_shared_store_path else None
+
+    @property
+    def cache_snapshot_file(self) -> Path | None:
+        return self.absolute_path(self.cache_snapshot_path) if self.cache_snapshot_path else None
+
 
 settings = Settings()
@@ -0,0 +1,113 @@
+"""Minimal RFC 6902 JSON Patch generation/application.
+
+Only ``add``, ``remove`` and ``replace`` are emitted. Lists are diffed by
+trimming the common prefix and suffix, which keeps the typical change (a new
+call at the top, one event moved) down to a handful of operations.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+
+class JsonPatchError(ValueError):
+    """Patch cannot be applied to the given document."""
+
+
+def _escape(token: str | int) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> list[dict]:
+    """Return the operations turning ``old`` into ``new``."""
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        return _diff_dict(old, new, path)
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_list(old, new, path)
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _diff_dict(old: dict, new: dict, path: str) -> list[dict]:
+    ops: list[dict] = []
+    for key in old:
+        if key not in new:
+            ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+    for key, value in new.items():
+        child = f"{path}/{_escape(key)}"
+        if key not in old:
+            ops.append({"op": "add", "path": child, "value": value})
+        else:
+            ops.extend(make_patch(old[key], value, child))
+    return ops
+
+
+def _diff_list(old: list, new: list, path: str) -> list[dict]:
+    start = 0
+    while start < len(old) and start < len(new) and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+
+    ops: list[dict] = []
+    common = min(old_end, new_end) - start
+    for offset in range(common):
+        i = start + offset
+        ops.extend(make_patch(old[i], new[i], f"{path}/{i}"))
+    for _ in range(old_end - start - common):
+        ops.append({"op": "remove", "path": f"{path}/{start + common}"})
+    for i in range(start + common, new_end):
+        ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+    return ops
+
+
+def apply_patch(doc: Any, patch: list[dict]) -> Any:
+    """Apply ``patch`` to a deep copy of ``doc`` and return the result."""
+    result = copy.deepcopy(doc)
+    for op in patch:
+        result = _apply_op(result, op)
+    return result
+
+
+def _apply_op(doc: Any, op: dict) -> Any:
+    path = op["path"]
+    if path == "":
+        if op["op"] == "remove":
+            raise JsonPatchError("cannot remove the document root")
+        return op["value"]
+    *parents, last = [_unescape(t) for t in path.split("/")[1:]]
+    target = doc
+    try:
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            if op["op"] == "add":
+                target.insert(index, op["value"])
+            elif op["op"] == "remove":
+                del target[index]
+            elif op["op"] == "replace":
+                target[index] = op["value"]
+            else:
+                raise JsonPatchError(f"unsupported op {op['op']!r}")
+        elif op["op"] in ("add", "replace"):
+            if op["op"] == "replace" and last not in target:
+                raise JsonPatchError(f"path not found: {path}")
+            target[last] = op["value"]
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            raise JsonPatchError(f"unsupported op {op['op']!r}")
+    except JsonPatchError:
+        raise
+    except (KeyError, IndexError, ValueError, TypeError) as exc:
+        raise JsonPatchError(f"cannot apply {op['op']} at {path}: {exc}") from exc
+    return doc
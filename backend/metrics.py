@@ -0,0 +1,62 @@
+"""Prometheus metrics (served at ``/api/metrics``).
+
+* Job phases: ``fetch`` (upstream), ``etag`` (serialise + hash), ``transform``
+  (view, compression, patch) and ``publish`` (subscribers, snapshot, shared
+  store), per cache.
+* Counters for ETag changes, job errors, upstream retries (tenacity
+  ``before_sleep`` hook, see ``retry_hook``) and messages ``_publish`` dropped
+  for slow subscribers.
+* HTTP latency and responses by endpoint and status (304 vs 200).
+* Gauges are callbacks registered by the owning modules (``watch``), so they
+  cost nothing between scrapes. Metrics are per process.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from tenacity import RetryCallState
+
+__all__ = ["CONTENT_TYPE_LATEST", "render"]
+
+# Pi-sized buckets: sub-millisecond transforms up to minute-long upstream calls.
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+JOB_PHASE_SECONDS = Histogram(
+    "hic_job_phase_seconds", "Cache job duration per phase", ["job", "phase"], buckets=_BUCKETS
+)
+ETAG_CHANGES = Counter("hic_etag_changes_total", "Fetches that produced a new ETag", ["job"])
+JOB_ERRORS = Counter("hic_job_errors_total", "Failed cache job fetches", ["job"])
+JOB_SKIPPED = Counter("hic_job_skipped_total", "Runs skipped by an open circuit breaker", ["job"])
+UPSTREAM_RETRIES = Counter("hic_upstream_retries_total", "Retried upstream requests", ["upstream"])
+PUBLISH_DROPPED = Counter("hic_publish_dropped_total", "Messages dropped for slow subscribers")
+SSE_RESYNCS = Counter("hic_sse_resyncs_total", "SSE clients that fell behind the ring and were resynced")
+
+HTTP_SECONDS = Histogram("hic_http_request_seconds", "HTTP request latency", ["endpoint", "method"], buckets=_BUCKETS)
+HTTP_RESPONSES = Counter("hic_http_responses_total", "HTTP responses", ["endpoint", "method", "status"])
+
+
+def watch(name: str, documentation: str, fn: Callable[[], float]) -> Gauge:
+    """Gauge whose value is read from ``fn`` at scrape time."""
+    gauge = Gauge(name, documentation)
+    gauge.set_function(fn)
+    return gauge
+
+
+def retry_hook(upstream: str) -> Callable[[RetryCallState], None]:
+    """tenacity ``before_sleep`` callback counting retries of ``upstream``."""
+    counter = UPSTREAM_RETRIES.labels(upstream)
+
+    def _count(_state: RetryCallState) -> None:
+        counter.inc()
+
+    return _count
+
+
+def render() -> bytes:
+    return generate_latest()
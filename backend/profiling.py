@@ -0,0 +1,270 @@
+"""Opt-in profiling of cache jobs and HTTP requests.
+
+* Off by default; while off, ``capture`` hands out a shared no-op context and
+  ``bind`` returns its argument, so the hot paths only check one flag.
+* Toggled at runtime via ``POST /api/debug/profiling`` (requires
+  ``DEBUG_TOKEN``) or ``kill -s RTMIN+2 <worker pid>``.
+* Each capture is a cProfile run, plus the tracemalloc growth (top lines)
+  when ``trace_memory`` is on. The last ``keep`` captures per job/endpoint are
+  kept and downloadable as pstats or speedscope JSON.
+* Only one capture runs at a time per process; overlapping jobs/requests are
+  simply not sampled. Since Python 3.12 cProfile is interpreter-wide
+  (``sys.monitoring``), so a capture also sees its fetch threads and
+  whatever else runs concurrently (other greenlets under gevent, other
+  coroutines on the event loop). On older Pythons cProfile hooks a single
+  thread and work handed to another thread joins through ``bind``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import itertools
+import marshal
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from logging_config import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = get_logger(__name__)
+
+_OFF = contextlib.nullcontext()
+# Before 3.12 a cProfile.Profile only sees the thread that enabled it.
+_PER_THREAD = sys.version_info < (3, 12)
+
+
+@dataclass(slots=True)
+class ProfileRecord:
+    id: int
+    kind: str
+    name: str
+    started_at: datetime
+    duration: float
+    # Raw ``pstats.Stats.stats`` mapping.
+    stats: dict
+    allocations: list[str] = field(default_factory=list)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration": round(self.duration, 4),
+            "allocations": self.allocations,
+        }
+
+    def to_pstats(self) -> bytes:
+        """Same bytes as ``pstats.Stats.dump_stats`` (load with ``pstats``/snakeviz)."""
+        return marshal.dumps(self.stats)
+
+    def to_speedscope(self) -> dict[str, Any]:
+        """Speedscope "sampled" profile reconstructed from the aggregated stats.
+
+        Each function's own time is placed on its heaviest caller chain.
+        """
+        frames: list[dict[str, Any]] = []
+        index: dict[tuple, int] = {}
+
+        def frame(func: tuple) -> int:
+            if func not in index:
+                filename, line, name = func
+                index[func] = len(frames)
+                frames.append({"name": name, "file": filename, "line": line})
+            return index[func]
+
+        samples: list[list[int]] = []
+        weights: list[float] = []
+        for func, (_cc, _nc, tottime, _ct, _callers) in self.stats.items():
+            if tottime <= 0:
+                continue
+            chain, seen = [func], {func}
+            callers = self.stats[func][4]
+            while callers:
+                caller = max(callers, key=lambda c: callers[c][3])
+                if caller in seen or caller not in self.stats:
+                    break
+                chain.append(caller)
+                seen.add(caller)
+                callers = self.stats[caller][4]
+            samples.append([frame(f) for f in reversed(chain)])
+            weights.append(tottime)
+
+        title = f"{self.kind} {self.name} #{self.id}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": title,
+            "exporter": "home-info-center",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": title,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class _Capture:
+    __slots__ = ("before", "kind", "name", "profiles", "started_at", "t0")
+
+    def __init__(self, kind: str, name: str) -> None:
+        self.kind = kind
+        self.name = name
+        self.profiles: list[cProfile.Profile] = []
+        self.before: tracemalloc.Snapshot | None = None
+        self.started_at = datetime.now(UTC)
+        self.t0 = 0.0
+
+
+class _CaptureContext:
+    __slots__ = ("_capture", "_key", "_profiler")
+
+    def __init__(self, profiler: Profiler, kind: str, name: str) -> None:
+        self._profiler = profiler
+        self._key = (kind, name)
+        self._capture: _Capture | None = None
+
+    def __enter__(self) -> None:
+        self._capture = self._profiler.begin(*self._key)
+
+    def __exit__(self, *_exc: object) -> None:
+        self._profiler.end(self._capture)
+
+
+class Profiler:
+    """Runtime-switchable cProfile/tracemalloc captures with bounded history."""
+
+    def __init__(self, keep: int = 5, top_allocations: int = 15) -> None:
+        self.enabled = False
+        self.trace_memory = False
+        self.keep = keep
+        self.top_allocations = top_allocations
+        self._records: dict[tuple[str, str], deque[ProfileRecord]] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._local = threading.local()
+        self._active: _Capture | None = None
+        self._started_tracemalloc = False
+
+    def configure(self, enabled: bool, trace_memory: bool = False) -> None:
+        with self._lock:
+            self.enabled = enabled
+            self.trace_memory = enabled and trace_memory
+            if self.trace_memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            elif not self.trace_memory and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        logger.info("Profiling %s (tracemalloc=%s)", "on" if enabled else "off", self.trace_memory)
+
+    def toggle(self) -> None:
+        self.configure(not self.enabled, self.trace_memory)
+
+    def capture(self, kind: str, name: str) -> contextlib.AbstractContextManager:
+        """Context manager profiling its body (no-op while disabled)."""
+        if not self.enabled:
+            return _OFF
+        return _CaptureContext(self, kind, name)
+
+    def begin(self, kind: str, name: str) -> _Capture | None:
+        """Start a capture; ``None`` when off or another capture is running."""
+        if not self.enabled:
+            return None
+        cap = _Capture(kind, name)
+        with self._lock:
+            if self._active is not None:
+                return None
+            self._active = cap
+        if self.trace_memory and tracemalloc.is_tracing():
+            cap.before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiling tool is active
+            with self._lock:
+                self._active = None
+            return None
+        cap.profiles.append(profile)
+        cap.t0 = time.perf_counter()
+        self._local.capture = cap
+        return cap
+
+    def end(self, cap: _Capture | None) -> None:
+        if cap is None:
+            return
+        cap.profiles[0].disable()
+        duration = time.perf_counter() - cap.t0
+        self._local.capture = None
+        with self._lock:
+            self._active = None
+        stats = pstats.Stats(*cap.profiles)
+        allocations: list[str] = []
+        if cap.before is not None and tracemalloc.is_tracing():
+            growth = tracemalloc.take_snapshot().compare_to(cap.before, "lineno")
+            allocations = [str(stat) for stat in growth[: self.top_allocations]]
+        record = ProfileRecord(
+            id=next(self._seq),
+            kind=cap.kind,
+            name=cap.name,
+            started_at=cap.started_at,
+            duration=duration,
+            stats=stats.stats,  # type: ignore[attr-defined]
+            allocations=allocations,
+        )
+        with self._lock:
+            self._records.setdefault((cap.kind, cap.name), deque(maxlen=self.keep)).append(record)
+
+    def bind(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap ``fn`` so a run on another thread joins this thread's capture.
+
+        A no-op since Python 3.12: the active profile already sees every thread.
+        """
+        cap = getattr(self._local, "capture", None) if self.enabled and _PER_THREAD else None
+        if cap is None:
+            return fn
+
+        def _profiled(*args: Any, **kwargs: Any) -> Any:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                cap.profiles.append(profile)
+
+        return _profiled
+
+    def records(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [r.summary() for records in self._records.values() for r in records]
+
+    def get(self, record_id: int) -> ProfileRecord | None:
+        with self._lock:
+            for records in self._records.values():
+                for record in records:
+                    if record.id == record_id:
+                        return record
+        return None
+
+
+profiler = Profiler()
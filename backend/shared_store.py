@@ -0,0 +1,156 @@
+"""Cross-process cache store and scheduler lease (SQLite).
+
+Lets several gunicorn workers share one set of cache entries:
+
+* Exactly one worker holds the ``scheduler`` lease and runs the fetch jobs;
+  it writes every change to the store. The lease expires after
+  ``lease_seconds`` unless renewed, so another worker takes over when the
+  leader dies.
+* Every worker polls the store (a single indexed query) and applies changes
+  written by others to its local ``CacheService``, which then notifies its
+  own SSE subscribers.
+* Followers forward manual refreshes (``request_refresh``); the leader picks
+  them up on its next poll, so only the leader ever talks to upstreams.
+* SQLite in WAL mode is local, needs no extra service and tolerates
+  concurrent readers and a single writer.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_LEASE_NAME = "scheduler"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    name    TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    writer  TEXT NOT NULL,
+    fields  BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_version ON entries(version);
+CREATE TABLE IF NOT EXISTS lease (
+    name    TEXT PRIMARY KEY,
+    holder  TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    id  INTEGER PRIMARY KEY CHECK (id = 0),
+    seq INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (id, seq) VALUES (0, 0);
+CREATE TABLE IF NOT EXISTS refresh_requests (
+    name      TEXT PRIMARY KEY,
+    requested REAL NOT NULL
+);
+"""
+
+
+class SharedStore:
+    """SQLite-backed entry store plus leader lease, shared by all workers."""
+
+    def __init__(self, path: Path, lease_seconds: float = 15.0) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- entries -----------------------------------------------------------
+
+    def write(self, name: str, fields: dict[str, Any]) -> int:
+        """Store ``fields`` for ``name``; returns the new store version."""
+        blob = pickle.dumps(fields, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("UPDATE meta SET seq = seq + 1 WHERE id = 0")
+                (version,) = self._conn.execute("SELECT seq FROM meta WHERE id = 0").fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (name, version, writer, fields) VALUES (?, ?, ?, ?)",
+                    (name, version, self.holder_id, blob),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return version
+
+    def changes_since(self, version: int) -> list[tuple[int, str, str, dict[str, Any]]]:
+        """Return ``(version, name, writer, fields)`` for entries newer than ``version``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, name, writer, fields FROM entries WHERE version > ? ORDER BY version",
+                (version,),
+            ).fetchall()
+        return [(v, name, writer, pickle.loads(blob)) for v, name, writer, blob in rows]
+
+    # -- forwarded refreshes -----------------------------------------------
+
+    def request_refresh(self, name: str) -> None:
+        """Ask the leader to refresh ``name`` (deduplicated until it is taken)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO refresh_requests (name, requested) VALUES (?, ?)", (name, time.time())
+            )
+
+    def take_refresh_requests(self) -> list[str]:
+        """Remove and return the pending refresh requests."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute("SELECT name FROM refresh_requests ORDER BY requested").fetchall()
+                self._conn.execute("DELETE FROM refresh_requests")
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [name for (name,) in rows]
+
+    # -- leader lease ------------------------------------------------------
+
+    def acquire_lease(self) -> bool:
+        """Take or renew the scheduler lease; ``True`` if this process holds it."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT holder, expires FROM lease WHERE name = ?", (_LEASE_NAME,)).fetchone()
+            if row is not None and row[0] == self.holder_id and row[1] - now > self.lease_seconds / 2:
+                return True  # plenty of time left, skip the write
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT holder, expires FROM lease WHERE name = ?", (_LEASE_NAME,)).fetchone()
+                if row is None or row[0] == self.holder_id or row[1] < now:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO lease (name, holder, expires) VALUES (?, ?, ?)",
+                        (_LEASE_NAME, self.holder_id, now + self.lease_seconds),
+                    )
+                    held = True
+                else:
+                    held = False
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return held
+
+    def release_lease(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM lease WHERE name = ? AND holder = ?", (_LEASE_NAME, self.holder_id))
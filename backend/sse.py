@@ -0,0 +1,138 @@
+"""Server-Sent Events fan-out.
+
+* One ``Broadcaster`` serves every connected display. It registers itself as a
+  single ``CacheService`` subscriber, so ``_publish`` does O(1) work no matter
+  how many clients are connected.
+* Frames are rendered once per change and kept in a bounded ring; each client
+  only holds a cursor into it (no per-client queue). Clients that fall behind
+  the ring get a resync with the latest version of every cache.
+* Clients pick a mode: ``notify`` (``{name, etag}``, default), ``inline``
+  (plus the endpoint body as ``data``) or ``patch`` (an RFC 6902 ``patch``
+  against the ``base`` etag the client received last; falls back to ``data``
+  when no patch exists). Initial snapshot and resync frames always carry the
+  full body in ``inline``/``patch`` mode.
+* Waiting uses ``threading.Condition``. Under the gevent gunicorn worker (see
+  Dockerfile) that is a cheap greenlet wait, so hundreds of idle connections
+  do not consume OS threads. Dead clients surface as a write error at the next
+  heartbeat at the latest.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+import metrics
+from cache_service import cache_service
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator
+
+    from cache_service import CacheEntry
+
+MODES = ("notify", "inline", "patch")
+
+
+def _frame(data: str) -> str:
+    return f"event: cache-updated\ndata: {data}\n\n"
+
+
+class Broadcaster:
+    """Shared SSE fan-out; implements the ``CacheService`` subscriber protocol."""
+
+    def __init__(self, history: int = 256, lookup: Callable[[str], CacheEntry] | None = None) -> None:
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._ring: deque[tuple[int, dict[str, str]]] = deque(maxlen=history)
+        self._latest: dict[str, dict[str, str]] = {}
+        self._clients = 0
+        self._lookup = lookup
+
+    @property
+    def client_count(self) -> int:
+        with self._cond:
+            return self._clients
+
+    @property
+    def backlog(self) -> int:
+        """Frames currently held in the ring."""
+        with self._cond:
+            return len(self._ring)
+
+    def put_nowait(self, msg: dict) -> None:
+        """Called by ``CacheService._publish``; never blocks, never drops."""
+        frames = self._render(msg)
+        with self._cond:
+            self._seq += 1
+            self._ring.append((self._seq, frames))
+            self._latest[msg["name"]] = frames
+            self._cond.notify_all()
+
+    def _render(self, msg: dict) -> dict[str, str]:
+        """Render the frame for every mode once; all clients share them."""
+        notify = _frame(json.dumps(msg))
+        frames = dict.fromkeys(MODES, notify)
+        entry = self._entry(msg)
+        if entry is None:
+            return frames
+        head = f'{{"name": {json.dumps(entry.name)}, "etag": {json.dumps(entry.etag)}'
+        frames["inline"] = _frame(f'{head}, "data": {entry.body.decode()}}}')
+        frames["patch"] = (
+            _frame(f'{head}, "base": {json.dumps(entry.base_etag)}, "patch": {entry.patch.decode()}}}')
+            if entry.patch
+            else frames["inline"]
+        )
+        return frames
+
+    def _entry(self, msg: dict) -> CacheEntry | None:
+        if self._lookup is None:
+            return None
+        try:
+            entry = self._lookup(msg["name"])
+        except KeyError:
+            return None
+        # A newer version may already be stored; then only the notification is safe.
+        return entry if entry.body and entry.etag == msg["etag"] else None
+
+    def stream(self, heartbeat: float = 15.0, mode: str = "notify") -> Generator[str, None, None]:
+        """Yield SSE frames for one client until the generator is closed."""
+        if mode not in MODES:
+            raise ValueError(f"unknown stream mode {mode!r}")
+        snapshot_mode = "notify" if mode == "notify" else "inline"
+        with self._cond:
+            cursor = self._seq
+            initial = [frames[snapshot_mode] for frames in self._latest.values()]
+            self._clients += 1
+        try:
+            yield ": connected\n\n"
+            yield from initial
+            while True:
+                with self._cond:
+                    if self._seq == cursor:
+                        self._cond.wait(heartbeat)
+                    pending = self._pending_since(cursor, mode, snapshot_mode)
+                    cursor = self._seq
+                if pending:
+                    yield from pending
+                else:
+                    yield f": ping {int(time.time())}\n\n"
+        finally:
+            with self._cond:
+                self._clients -= 1
+
+    def _pending_since(self, cursor: int, mode: str, snapshot_mode: str) -> list[str]:
+        if self._seq == cursor:
+            return []
+        if not self._ring or self._ring[0][0] > cursor + 1:
+            # Client fell behind the ring: resend the current version of everything.
+            metrics.SSE_RESYNCS.inc()
+            return [frames[snapshot_mode] for frames in self._latest.values()]
+        return [frames[mode] for seq, frames in self._ring if seq > cursor]
+
+
+broadcaster = Broadcaster(lookup=cache_service.get)
+metrics.watch("hic_sse_clients", "Connected SSE clients", lambda: broadcaster.client_count)
+metrics.watch("hic_sse_ring_frames", "Frames held in the SSE ring buffer", lambda: broadcaster.backlog)
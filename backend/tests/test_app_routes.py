@@ -8,18 +8,23 @@ import pytest
 
 
 @pytest.fixture
-def client(monkeypatch):
+def client(monkeypatch, tmp_path):
     # Disable scheduler start during tests
     from cache_service import cache_service
+    from config import settings
+
+    monkeypatch.setattr(settings, "cache_snapshot_path", str(tmp_path / "cache_snapshot.pickle"))
+    monkeypatch.setattr(cache_service, "_snapshot_path", None)
 
     monkeypatch.setattr(cache_service, "start", lambda: None)
     monkeypatch.setattr(cache_service, "_scheduler", _FakeScheduler())
+    monkeypatch.setattr(cache_service, "_entries", {})
+    monkeypatch.setattr(cache_service, "_refreshed_at", {})
 
     with (
         patch("Calendar.get_events.get_all_events", return_value={}),
         patch("FritzBox.fritzbox_calllist.get_calls_grouped", return_value={}),
-        patch("Weather.weather.get_hourly_forecast", return_value={}),
-        patch("Weather.weather.get_daily_forecast", return_value=[]),
+        patch("Weather.weather.get_weather_async", return_value={}),
     ):
         from app import create_app
 
@@ -30,7 +35,7 @@ def client(monkeypatch):
 
 
 class _FakeScheduler:
-    running = False
+    running = True  # start() is patched out; report a live scheduler
 
     def add_job(self, *_, **__):
         pass
@@ -45,13 +50,19 @@ class _FakeScheduler:
         return []
 
 
-def test_health_returns_503_when_no_data(client):
+def test_health_is_live_but_not_ready_without_data(client):
     r = client.get("/api/health")
-    assert r.status_code == 503
+    assert r.status_code == 200
     body = r.get_json()
-    assert body["status"] == "degraded"
+    assert body["status"] == "ok"
+    assert body["ready"] is False
+    assert body["cold_start_seconds"] is None
     assert "caches" in body
 
+    r = client.get("/api/health/ready")
+    assert r.status_code == 503
+    assert r.get_json()["waiting_for"] == ["calls", "events", "weather"]
+
 
 def test_config_endpoint_returns_themes(client):
     r = client.get("/api/config")
@@ -61,6 +72,159 @@ def test_config_endpoint_returns_themes(client):
     assert "theme_day_bg" in body
 
 
+def test_config_uses_primary_weather_location(client, monkeypatch):
+    from config import WeatherLocation, settings
+
+    monkeypatch.setattr(
+        settings,
+        "weather_locations",
+        [WeatherLocation(name="Haus", lat=48.1, lon=11.6), WeatherLocation(name="Oma", lat=53.5, lon=10.0)],
+    )
+    body = client.get("/api/config").get_json()
+    assert (body["lat"], body["lon"]) == (48.1, 11.6)
+
+
 def test_events_endpoint_503_without_data(client):
     r = client.get("/api/events")
     assert r.status_code == 503
+
+
+def test_events_endpoint_serves_body_and_304(client):
+    from app import _events_view
+    from cache_service import CacheJob, cache_service
+
+    job = CacheJob(name="events", fetch=lambda: {"2026-06-22": []}, interval_seconds=60, view=_events_view)
+    cache_service._run_job(job)
+    etag = cache_service.get("events").etag
+
+    r = client.get("/api/events")
+    assert r.status_code == 200
+    assert r.headers["ETag"] == etag
+    assert r.get_json() == {"data": {"2026-06-22": []}, "etag": etag}
+
+    r = client.get("/api/events", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+
+def test_events_endpoint_negotiates_gzip_variant(client):
+    import gzip
+
+    from app import _events_view
+    from cache_service import CacheJob, cache_service
+
+    payload = {"2026-06-22": [{"title": f"Termin {i}", "calendar": "Familie"} for i in range(50)]}
+    job = CacheJob(name="events", fetch=lambda: payload, interval_seconds=60, view=_events_view)
+    cache_service._run_job(job)
+    etag = cache_service.get("events").etag
+
+    r = client.get("/api/events", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert r.headers["ETag"] == f"{etag}-gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert gzip.decompress(r.data).decode() == cache_service.get("events").body.decode()
+
+    r = client.get("/api/events", headers={"Accept-Encoding": "gzip", "If-None-Match": f"{etag}-gzip"})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == f"{etag}-gzip"
+
+
+def test_since_returns_json_patch_for_known_version(client):
+    import json
+
+    from app import _calls_view
+    from cache_service import CacheJob, cache_service
+    from json_patch import apply_patch
+
+    state = {"2026-06-22": [{"name": f"Anruf {i}"} for i in range(30)]}
+    job = CacheJob(name="calls", fetch=lambda: state, interval_seconds=60, view=_calls_view)
+    cache_service._run_job(job)
+    old_etag = cache_service.get("calls").etag
+    old = client.get("/api/calls").get_json()
+
+    state = {"2026-06-22": [{"name": "Neu"}, *state["2026-06-22"]]}
+    cache_service._run_job(job)
+    new_etag = cache_service.get("calls").etag
+
+    r = client.get(f"/api/calls?since={old_etag}-gzip")
+    assert r.status_code == 200
+    assert r.mimetype == "application/json-patch+json"
+    assert r.headers["ETag"] == new_etag
+    assert apply_patch(old, json.loads(r.data)) == {"calls": state, "etag": new_etag}
+
+    r = client.get("/api/calls?since=evicted")
+    assert r.mimetype == "application/json"
+    assert r.get_json()["etag"] == new_etag
+
+    assert client.get(f"/api/calls?since={new_etag}").status_code == 304
+
+
+def test_refresh_endpoint_returns_fresh_etag(client):
+    from cache_service import CacheJob, cache_service
+
+    cache_service.register(CacheJob(name="calls", fetch=lambda: {"2026-06-22": []}, interval_seconds=60))
+    r = client.post("/api/refresh/calls")
+    assert r.status_code == 200
+    assert r.get_json()["etag"] == cache_service.get("calls").etag
+    assert r.headers["ETag"] == r.get_json()["etag"]
+
+    r = client.post("/api/refresh/calls")
+    assert r.status_code == 429
+    assert "Retry-After" in r.headers
+    assert client.post("/api/refresh/nope").status_code == 404
+
+
+def test_refresh_does_not_mask_internal_key_errors_as_404(client, monkeypatch):
+    from cache_service import CacheJob, cache_service
+
+    cache_service.register(CacheJob(name="calls", fetch=dict, interval_seconds=60))
+
+    def broken(*_args, **_kwargs):
+        raise KeyError("calls")
+
+    monkeypatch.setattr(cache_service, "_run_once", broken)
+    with pytest.raises(KeyError):
+        client.post("/api/refresh/calls")
+
+
+def test_metrics_count_200_and_304_per_endpoint(client):
+    from app import _events_view
+    from cache_service import CacheJob, cache_service
+
+    cache_service._run_job(CacheJob(name="events", fetch=lambda: {"d": []}, interval_seconds=60, view=_events_view))
+    etag = client.get("/api/events").headers["ETag"]
+    client.get("/api/events", headers={"If-None-Match": etag})
+
+    r = client.get("/api/metrics")
+    assert r.status_code == 200
+    text = r.get_data(as_text=True)
+    assert 'hic_http_responses_total{endpoint="/api/events",method="GET",status="304"}' in text
+    assert 'hic_http_responses_total{endpoint="/api/events",method="GET",status="200"}' in text
+    assert 'hic_job_phase_seconds_count{job="events",phase="transform"}' in text
+    assert "hic_sse_clients" in text
+
+
+def test_debug_profiling_requires_token_and_serves_downloads(client, monkeypatch):
+    from config import settings
+    from profiling import profiler
+
+    assert client.post("/api/debug/profiling").status_code == 404
+    monkeypatch.setattr(settings, "debug_token", "s3cret")
+    auth = {"Authorization": "Bearer s3cret"}
+    assert client.post("/api/debug/profiling", headers={"Authorization": "Bearer wrong"}).status_code == 404
+
+    r = client.post("/api/debug/profiling", json={"enabled": True}, headers=auth)
+    try:
+        assert r.get_json() == {"enabled": True, "trace_memory": False}
+        client.get("/api/config")
+    finally:
+        profiler.configure(False)
+
+    profiles = client.get("/api/debug/profiles", headers=auth).get_json()["profiles"]
+    record = next(p for p in profiles if p["name"] == "/api/config")
+    r = client.get(f"/api/debug/profiles/{record['id']}?format=speedscope", headers=auth)
+    assert r.status_code == 200
+    assert "attachment" in r.headers["Content-Disposition"]
+    assert r.get_json()["profiles"][0]["type"] == "sampled"
+    r = client.get(f"/api/debug/profiles/{record['id']}?format=pstats", headers=auth)
+    assert r.mimetype == "application/octet-stream"
@@ -0,0 +1,24 @@
+"""Tests for the benchmark regression gate."""
+
+from __future__ import annotations
+
+from benchmarks.bench_suite import compare, measure, synthetic_events
+
+
+def test_compare_flags_only_cases_beyond_threshold():
+    baseline = {"a": 1.0, "b": 1.0, "c": 1.0}
+    results = {"a": 1.19, "b": 1.21, "c": 0.5, "new": 9.0}
+    assert compare(results, baseline, threshold=20) == ["b"]
+
+
+def test_measure_returns_per_call_seconds():
+    assert 0 < measure(lambda: sum(range(100)), repeat=2, min_time=0.001) < 0.01
+
+
+def test_synthetic_events_match_parse_event_shape():
+    from Calendar.get_events import group_events
+
+    events = synthetic_events(200)
+    grouped = group_events(events, max_total=10)
+    assert sum(len(v) for v in grouped.values()) >= 10
+    assert set(events[0]) == {"start", "end", "title", "all_day", "calendar"}
@@ -2,7 +2,18 @@
 
 from __future__ import annotations
 
-from cache_service import CacheJob, CacheService
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from queue import Queue
+
+import pytest
+from prometheus_client import REGISTRY
+
+import cache_service as module
+from cache_service import CacheJob, CacheService, RefreshRateLimitedError, time_of_day_profile
 
 
 def test_cache_updates_on_new_data():
@@ -19,6 +30,24 @@ def test_cache_updates_on_new_data():
     entry = svc.get("x")
     assert entry.data == {"value": 1}
     assert entry.etag != ""
+    assert json.loads(entry.body) == {"value": 1}
+
+
+def test_view_is_rendered_once_into_body():
+    svc = CacheService()
+    calls = {"n": 0}
+
+    def view(data, etag):
+        calls["n"] += 1
+        return {"items": data, "etag": etag}
+
+    job = CacheJob(name="v", fetch=lambda: [1, 2], interval_seconds=60, view=view)
+    svc.register(job)
+    svc._run_job(job)
+    svc._run_job(job)
+    entry = svc.get("v")
+    assert json.loads(entry.body) == {"items": [1, 2], "etag": entry.etag}
+    assert calls["n"] == 1
 
 
 def test_cache_etag_stable_when_data_unchanged():
@@ -59,3 +88,347 @@ def test_subscribe_receives_publication():
     msg = q.get(timeout=1)
     assert msg["name"] == "evt"
     assert msg["etag"]
+
+
+def test_delta_from_recent_version_and_fallback_after_eviction():
+    from json_patch import apply_patch
+
+    svc = CacheService(history_size=2)
+    state = {"calls": [{"name": f"Anruf {i}"} for i in range(30)]}
+    job = CacheJob(name="c", fetch=lambda: state, interval_seconds=60)
+    svc.register(job)
+    svc._run_job(job)
+    v1_etag, v1 = svc.get("c").etag, json.loads(svc.get("c").body)
+
+    state = {"calls": [{"name": "Neu"}, *state["calls"]]}
+    svc._run_job(job)
+    patch = svc.delta("c", v1_etag)
+    assert patch is not None
+    assert apply_patch(v1, json.loads(patch)) == state
+    assert svc.delta("c", svc.get("c").etag) is None
+    assert svc.delta("c", "unknown") is None
+
+    for i in range(2):
+        state = {"calls": [{"name": f"Neuer {i}"}, *state["calls"]]}
+        svc._run_job(job)
+    assert svc.delta("c", v1_etag) is None  # evicted from the ring
+
+
+class _RecordingScheduler:
+    def __init__(self):
+        self.jobs = {}
+        self.running = False
+
+    def add_job(self, _func, **kwargs):
+        self.jobs[kwargs["id"]] = kwargs
+
+    def get_jobs(self):
+        return list(self.jobs)
+
+    def start(self):
+        self.running = True
+
+
+def test_snapshot_restores_entries_as_stale(tmp_path):
+    path = tmp_path / "snap.pickle"
+    svc = CacheService()
+    svc.restore(path)
+    job = CacheJob(name="s", fetch=lambda: {"v": 1}, interval_seconds=600, view=lambda d, _etag: {"x": d})
+    svc.register(job)
+    svc._run_job(job)
+    before = svc.get("s")
+
+    warm = CacheService()
+    warm._scheduler = _RecordingScheduler()
+    assert warm.restore(path) == 1
+    warm.register(job)
+    entry = warm.get("s")
+    assert (entry.etag, entry.body, entry.updated_at) == (before.etag, before.body, before.updated_at)
+    assert warm.snapshot()["s"]["stale"] is True
+    assert warm.snapshot()["s"]["has_data"] is True
+    # snapshot younger than the interval -> no immediate refetch
+    assert warm._scheduler.jobs["s"]["next_run_time"] > before.checked_at
+
+    warm._run_job(job)
+    assert warm.snapshot()["s"]["stale"] is False
+
+
+def test_snapshot_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "snap.pickle"
+    path.write_bytes(b"not a pickle")
+    assert CacheService().restore(path) == 0
+
+
+class _ReschedulingScheduler(_RecordingScheduler):
+    def reschedule_job(self, job_id, **kwargs):
+        self.jobs[job_id].update(kwargs)
+
+
+def test_interval_backs_off_while_unchanged_and_tightens_on_change():
+    svc = CacheService()
+    svc._scheduler = _ReschedulingScheduler()
+    state = {"v": 1}
+    job = CacheJob(name="a", fetch=lambda: dict(state), interval_seconds=100, max_interval=300, backoff=2)
+    svc.register(job)
+
+    svc._run_job(job)
+    assert svc.snapshot()["a"]["interval_reason"] == "changed"
+    svc._run_job(job)
+    assert svc._scheduler.jobs["a"]["seconds"] == 200
+    svc._run_job(job)
+    assert (svc.snapshot()["a"]["interval"], svc.snapshot()["a"]["interval_reason"]) == (300, "unchanged, at max")
+
+    state["v"] = 2
+    svc._run_job(job)
+    assert svc._scheduler.jobs["a"]["seconds"] == 100
+
+
+def test_time_of_day_profile_scales_interval():
+    night = time_of_day_profile(22, 6, 4)
+    assert night(datetime(2026, 1, 1, 23)) == 4
+    assert night(datetime(2026, 1, 1, 5)) == 4
+    assert night(datetime(2026, 1, 1, 12)) == 1
+
+    svc = CacheService()
+    svc._scheduler = _ReschedulingScheduler()
+    job = CacheJob(name="p", fetch=dict, interval_seconds=60, profile=lambda _now: 3)
+    svc.register(job)
+    svc._run_job(job)
+    assert svc.snapshot()["p"]["interval"] == 180
+    assert svc.snapshot()["p"]["interval_reason"] == "changed, time-of-day x3"
+
+
+def test_profile_sees_configured_timezone(monkeypatch):
+    monkeypatch.setattr(module.settings, "timezone", "Pacific/Auckland")
+    seen: list[datetime] = []
+    svc = CacheService()
+    svc._scheduler = _ReschedulingScheduler()
+    job = CacheJob(name="tz", fetch=dict, interval_seconds=60, profile=lambda now: seen.append(now) or 1.0)
+    svc.register(job)
+    svc._run_job(job)
+    assert str(seen[0].tzinfo) == "Pacific/Auckland"
+
+
+def test_idle_mode_slows_jobs_and_demand_wakes_them(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+    svc = CacheService()
+    svc._scheduler = _ReschedulingScheduler()
+    svc._scheduler.modify_job = lambda job_id, **kwargs: svc._scheduler.jobs[job_id].update(kwargs)
+    svc.enable_idle(after_seconds=600, interval=1800)
+    job = CacheJob(name="i", fetch=dict, interval_seconds=60)
+    svc.register(job)
+
+    svc._run_job(job)
+    assert svc.snapshot()["i"]["interval"] == 60
+
+    clock[0] += 601
+    svc._run_job(job)
+    assert svc._scheduler.jobs["i"]["seconds"] == 1800
+    assert svc.snapshot()["i"]["interval_reason"] == "idle: no clients"
+
+    svc.note_demand()
+    assert svc._scheduler.jobs["i"]["seconds"] == 60
+    assert svc._scheduler.jobs["i"]["next_run_time"] is not None
+    assert svc.snapshot()["i"]["interval_reason"] == "demand resumed"
+
+
+def test_connected_clients_keep_jobs_awake(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+    svc = CacheService()
+    svc.enable_idle(after_seconds=600, interval=1800)
+    subscriber = svc.subscribe()
+    clock[0] += 601
+    assert svc._is_idle() is False
+    svc.unsubscribe(subscriber)
+    assert svc._is_idle() is True
+
+
+class _LookupSubscriber:
+    """Like the SSE broadcaster: looks the entry up while handling a message."""
+
+    client_count = 0
+
+    def __init__(self, svc, entered):
+        self._svc = svc
+        self._entered = entered
+
+    def put_nowait(self, msg):
+        self._entered.set()
+        time.sleep(0.1)  # let the other run take _lock meanwhile
+        self._svc.get(msg["name"])
+
+
+def test_unchanged_run_and_publish_do_not_deadlock():
+    svc = CacheService()
+    svc._scheduler = _ReschedulingScheduler()
+    svc.enable_idle(after_seconds=600, interval=1800)
+    quiet = CacheJob(name="quiet", fetch=dict, interval_seconds=60)
+    state = {"v": 0}
+    busy = CacheJob(name="busy", fetch=lambda: dict(state), interval_seconds=60)
+    svc.register(quiet)
+    svc.register(busy)
+    svc._run_job(quiet)
+    entered = threading.Event()
+    svc.subscribe(_LookupSubscriber(svc, entered))
+    entered.clear()  # set by the kick-off snapshot
+
+    state["v"] = 1
+    publisher = threading.Thread(target=svc._run_job, args=(busy,), daemon=True)
+    publisher.start()
+    assert entered.wait(2)
+    unchanged = threading.Thread(target=svc._run_job, args=(quiet,), daemon=True)
+    unchanged.start()
+    publisher.join(3)
+    unchanged.join(3)
+    assert not publisher.is_alive()
+    assert not unchanged.is_alive()
+
+
+def test_warmup_orders_first_fetch_by_priority_and_tracks_cold_start():
+    svc = CacheService()
+    svc._scheduler = _RecordingScheduler()
+    svc.set_warmup(10)
+    jobs = [CacheJob(name=n, fetch=dict, interval_seconds=60, priority=p) for n, p in (("slow", 2), ("fast", 0))]
+    for job in jobs:
+        svc.register(job)
+    runs = svc._scheduler.jobs
+    assert (runs["slow"]["next_run_time"] - runs["fast"]["next_run_time"]).total_seconds() >= 19
+
+    svc.start()
+    svc._run_job(jobs[1])
+    assert svc.cold_start_seconds is None
+    svc._run_job(jobs[0])
+    assert svc.cold_start_seconds is not None
+
+
+def test_async_fetcher_runs_on_event_loop():
+    svc = CacheService()
+
+    async def fetch():
+        await asyncio.sleep(0)
+        return {"async": True}
+
+    job = CacheJob(name="a", fetch=fetch, interval_seconds=60)
+    svc.register(job)
+    svc._run_job(job)
+    assert json.loads(svc.get("a").body) == {"async": True}
+
+
+def test_async_fetcher_is_cancelled_after_timeout():
+    svc = CacheService()
+    cancelled = []
+
+    async def fetch():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    job = CacheJob(name="slow", fetch=fetch, interval_seconds=60, timeout=0.05)
+    svc.register(job)
+    svc._run_job(job)
+    assert cancelled == [True]
+    assert "cancelled after 0.05s" in svc.snapshot()["slow"]["last_error"]
+
+
+def test_concurrent_refreshes_share_one_run():
+    svc = CacheService()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"n": len(calls)}
+
+    job = CacheJob(name="r", fetch=fetch, interval_seconds=60)
+    svc.register(job)
+    etags = []
+    threads = [threading.Thread(target=lambda: etags.append(svc.refresh("r"))) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    time.sleep(0.05)
+    assert svc.get("r").etag == ""  # readers keep the old version meanwhile
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert etags == [svc.get("r").etag] * 3
+
+
+def test_refresh_timeout_applies_to_sync_jobs():
+    svc = CacheService()
+    release = threading.Event()
+    job = CacheJob(name="slow", fetch=lambda: release.wait(5) and {"v": 1}, interval_seconds=60)
+    svc.register(job)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        svc.refresh("slow", timeout=0.1)
+    assert time.monotonic() - started < 1
+    release.set()
+    assert svc.refresh("slow") == svc.get("slow").etag != ""
+
+
+def test_refresh_is_rate_limited_per_cache():
+    svc = CacheService()
+    svc.register(CacheJob(name="r", fetch=dict, interval_seconds=60))
+    svc.refresh("r", min_interval=60)
+    with pytest.raises(RefreshRateLimitedError) as exc:
+        svc.refresh("r", min_interval=60)
+    assert exc.value.retry_after > 59
+    with pytest.raises(KeyError):
+        svc.refresh("unknown")
+
+
+def test_open_circuit_skips_fetch():
+    svc = CacheService()
+    svc.set_circuit_breaker(failure_threshold=2, reset_timeout=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise ConnectionError("down")
+
+    job = CacheJob(name="c", fetch=fetch, interval_seconds=60, upstream="box")
+    svc.register(job)
+    for _ in range(4):
+        svc._run_job(job)
+    assert len(calls) == 2
+    assert svc.snapshot()["c"]["circuit"]["state"] == "open"
+
+
+def test_sync_fetch_is_abandoned_at_deadline():
+    svc = CacheService()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"late": True}
+
+    job = CacheJob(name="d", fetch=fetch, interval_seconds=60, timeout=0.05)
+    svc.register(job)
+    svc._run_job(job)
+    assert "abandoned after 0.05s" in svc.snapshot()["d"]["last_error"]
+    svc._run_job(job)  # still stuck: no second fetch
+    assert len(calls) == 1
+    release.set()
+
+
+def test_publish_counts_dropped_messages():
+    svc = CacheService()
+    q = svc.subscribe(Queue(maxsize=1))
+    before = REGISTRY.get_sample_value("hic_publish_dropped_total")
+    svc._publish("a", "1")
+    svc._publish("a", "2")
+    assert REGISTRY.get_sample_value("hic_publish_dropped_total") == before + 1
+    assert svc.queue_depth() == 1
+    assert q.get_nowait()["etag"] == "2"
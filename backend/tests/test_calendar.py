@@ -2,12 +2,34 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime
 
+import pytest
+
 from Calendar import get_events
 from Calendar.get_events import _to_local_naive, get_all_events
 
 
+@pytest.fixture(autouse=True)
+def _reset_calendar_state():
+    for state in (get_events._in_flight, get_events._last_good, get_events._stores):
+        state.clear()
+    yield
+    for state in (get_events._in_flight, get_events._last_good, get_events._stores):
+        state.clear()
+
+
+def _event(day: int, title: str) -> dict:
+    return {
+        "start": datetime(2026, 6, day, 10, 0),
+        "end": datetime(2026, 6, day, 11, 0),
+        "title": title,
+        "all_day": False,
+    }
+
+
 def test_to_local_naive_strips_timezone():
     dt = _to_local_naive("2026-06-22T10:00:00+00:00")
     assert dt.tzinfo is None
@@ -67,6 +89,25 @@ def test_get_all_events_skips_failing_calendar(monkeypatch):
     assert get_all_events() == {}
 
 
+def test_get_all_events_skips_calendar_without_id(monkeypatch):
+    monkeypatch.setattr(
+        get_events,
+        "load_calendar_ids",
+        lambda: [{"name": "Ohne ID"}, {"name": "Familie", "id": "cal-1"}],
+    )
+    requested = []
+
+    def fetch(calendar_id, **_kw):
+        requested.append(calendar_id)
+        return [_event(22, "Termin")]
+
+    monkeypatch.setattr(get_events, "get_upcoming_events", fetch)
+
+    assert get_all_events()["2026-06-22"][0]["calendar"] == "Familie"
+    assert requested == ["cal-1"]
+    assert None not in get_events._last_good
+
+
 def test_multiday_event_shows_end_date(monkeypatch):
     monkeypatch.setattr(
         get_events,
@@ -87,3 +128,155 @@ def test_multiday_event_shows_end_date(monkeypatch):
     entry = grouped["2026-06-22"][0]
     assert entry["start_time"] == "09:00"
     assert entry["end_time"] == "23.06.2026 17:00"
+
+
+def test_calendars_are_fetched_concurrently(monkeypatch):
+    monkeypatch.setattr(
+        get_events,
+        "load_calendar_ids",
+        lambda: [{"name": f"Kal {i}", "id": f"cal-{i}"} for i in range(3)],
+    )
+
+    def slow(calendar_id, **_kw):
+        time.sleep(0.2)
+        return [_event(22, calendar_id)]
+
+    monkeypatch.setattr(get_events, "get_upcoming_events", slow)
+
+    started = time.perf_counter()
+    grouped = get_all_events()
+    assert time.perf_counter() - started < 0.5
+    assert [e["calendar"] for e in grouped["2026-06-22"]] == ["Kal 0", "Kal 1", "Kal 2"]
+
+
+def test_calendar_missing_deadline_uses_last_good_result(monkeypatch):
+    monkeypatch.setattr(
+        get_events,
+        "load_calendar_ids",
+        lambda: [{"name": "Schnell", "id": "fast"}, {"name": "Langsam", "id": "slow"}],
+    )
+    release = threading.Event()
+
+    def fetch(calendar_id, **_kw):
+        if calendar_id == "slow" and get_events._last_good.get("slow"):
+            release.wait(2)
+        return [_event(22 if calendar_id == "fast" else 23, calendar_id)]
+
+    monkeypatch.setattr(get_events, "get_upcoming_events", fetch)
+    first = get_all_events(deadline=2)
+    assert set(first) == {"2026-06-22", "2026-06-23"}
+
+    started = time.perf_counter()
+    second = get_all_events(deadline=0.1)
+    assert time.perf_counter() - started < 1
+    release.set()
+    assert second == first
+
+
+class _FakeEvents:
+    """Scripted stand-in for ``service.events()`` recording list() calls."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def list(self, **kwargs):
+        self.calls.append(kwargs)
+        response = self.responses.pop(0)
+        return _Exec(response)
+
+
+class _Exec:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+class _FakeService:
+    def __init__(self, events):
+        self._events = events
+
+    def events(self):
+        return self._events
+
+
+def _api_event(event_id: str, day: int, title: str, status: str = "confirmed") -> dict:
+    return {
+        "id": event_id,
+        "status": status,
+        "summary": title,
+        "start": {"date": f"2099-06-{day:02d}"},
+        "end": {"date": f"2099-06-{day + 1:02d}"},
+    }
+
+
+def test_event_store_incremental_sync_applies_changes():
+    fake = _FakeEvents(
+        [
+            {"items": [_api_event("a", 1, "Alt")], "nextPageToken": "p2"},
+            {"items": [_api_event("b", 2, "Bleibt")], "nextSyncToken": "s1"},
+            {"items": [_api_event("a", 1, "", status="cancelled"), _api_event("c", 3, "Neu")], "nextSyncToken": "s2"},
+        ]
+    )
+    store = get_events.EventStore("cal-1")
+    store.sync(_FakeService(fake))
+    assert [e["title"] for e in store.upcoming(10)] == ["Alt", "Bleibt"]
+    assert store.sync_token == "s1"
+
+    store.sync(_FakeService(fake))
+    assert [e["title"] for e in store.upcoming(10)] == ["Bleibt", "Neu"]
+    assert fake.calls[2]["syncToken"] == "s1"
+    assert "timeMin" not in fake.calls[2]
+    assert store.sync_token == "s2"
+
+
+def test_event_store_full_resync_on_410():
+    import httplib2
+
+    gone = get_events.HttpError(httplib2.Response({"status": 410}), b"")
+    fake = _FakeEvents(
+        [
+            {"items": [_api_event("a", 1, "Alt")], "nextSyncToken": "s1"},
+            gone,
+            {"items": [_api_event("b", 2, "Frisch")], "nextSyncToken": "s9"},
+        ]
+    )
+    store = get_events.EventStore("cal-1")
+    store.sync(_FakeService(fake))
+    store.sync(_FakeService(fake))
+    assert [e["title"] for e in store.upcoming(10)] == ["Frisch"]
+    assert "timeMin" in fake.calls[2]
+    assert store.sync_token == "s9"
+
+
+@pytest.mark.parametrize("status, invalidated", [(401, 1), (500, 0)])
+def test_rejected_credentials_are_invalidated(monkeypatch, status, invalidated):
+    import httplib2
+
+    error = get_events.HttpError(httplib2.Response({"status": status}), b"")
+    calls = {"invalidate": 0}
+
+    class _Credentials:
+        def invalidate(self):
+            calls["invalidate"] += 1
+
+    monkeypatch.setattr(get_events, "credential_manager", _Credentials())
+    monkeypatch.setattr(get_events.calendar_client, "service", lambda: _FakeService(_FakeEvents([error])))
+    monkeypatch.setattr(get_events, "_stores", {})
+    with pytest.raises(get_events.HttpError):
+        get_events.get_upcoming_events.__wrapped__("cal-1")
+    assert calls["invalidate"] == invalidated
+
+
+def test_event_store_prunes_ended_events():
+    store = get_events.EventStore("cal-1")
+    store.events = {
+        "old": {**_event(1, "Vorbei"), "start": datetime(2000, 1, 1, 9), "end": datetime(2000, 1, 1, 10)},
+        "new": {**_event(1, "Kommt"), "start": datetime(2099, 1, 1, 9), "end": datetime(2099, 1, 1, 10)},
+    }
+    assert [e["title"] for e in store.upcoming(10)] == ["Kommt"]
+    assert set(store.events) == {"new"}
@@ -0,0 +1,71 @@
+"""Tests for the in-memory Google credential manager and calendar client."""
+
+from __future__ import annotations
+
+import threading
+from datetime import UTC, datetime, timedelta
+
+from Calendar import calendar_auth
+from Calendar.calendar_auth import CredentialManager
+from Calendar.calendar_client import CalendarClient
+
+
+class _FakeCreds:
+    def __init__(self, expires_in: timedelta, token: str = "t0"):
+        self.token = token
+        self.refresh_token = "r"
+        self.expiry = (datetime.now(UTC) + expires_in).replace(tzinfo=None)
+        self.refreshed = 0
+
+    @property
+    def valid(self):
+        return self.expiry.replace(tzinfo=UTC) > datetime.now(UTC)
+
+    def refresh(self, _request):
+        self.refreshed += 1
+        self.token = f"t{self.refreshed}"
+        self.expiry = (datetime.now(UTC) + timedelta(hours=1)).replace(tzinfo=None)
+
+
+def test_credentials_loaded_once_and_not_rewritten(monkeypatch):
+    creds = _FakeCreds(timedelta(hours=1))
+    loads, writes = [], []
+    monkeypatch.setattr(calendar_auth, "get_credentials", lambda: loads.append(1) or creds)
+    monkeypatch.setattr(calendar_auth, "_persist", lambda *_a: writes.append(1))
+
+    manager = CredentialManager()
+    for _ in range(5):
+        assert manager.get() is creds
+    assert len(loads) == 1
+    assert creds.refreshed == 0
+    assert writes == []
+
+
+def test_credentials_refreshed_ahead_of_expiry_and_persisted(monkeypatch):
+    creds = _FakeCreds(timedelta(minutes=2))
+    writes = []
+    monkeypatch.setattr(calendar_auth, "get_credentials", lambda: creds)
+    monkeypatch.setattr(calendar_auth, "_persist", lambda c, _p: writes.append(c.token))
+
+    manager = CredentialManager(refresh_margin=timedelta(minutes=5))
+    manager.get()
+    manager.get()
+    assert creds.refreshed == 1
+    assert writes == ["t1"]
+
+
+def test_calendar_client_builds_one_service_per_thread(monkeypatch):
+    creds = _FakeCreds(timedelta(hours=1))
+    built = []
+    monkeypatch.setattr(calendar_auth, "get_credentials", lambda: creds)
+    monkeypatch.setattr(CalendarClient, "_build", lambda _self, c: built.append(c) or object())
+
+    client = CalendarClient(CredentialManager())
+    assert client.service() is client.service()
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(client.service()))
+    t.start()
+    t.join()
+    assert other[0] is not client.service()
+    assert len(built) == 2
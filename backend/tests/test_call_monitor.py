@@ -0,0 +1,79 @@
+"""Tests for the FritzBox call monitor client against a local fake server."""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+from cache_service import CacheJob, CacheService
+from FritzBox.call_monitor import CallMonitor, parse_line
+
+
+class _FakeCallMonitor:
+    """Accepts connections and sends one batch of lines per connection, then hangs up."""
+
+    def __init__(self, batches: list[list[str]]):
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        self._batches = batches
+        self.connections = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        for batch in self._batches:
+            conn, _ = self._server.accept()
+            self.connections += 1
+            with conn:
+                for line in batch:
+                    conn.sendall(line.encode() + b"\n")
+                time.sleep(0.05)
+        self._server.close()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_parse_line():
+    event = parse_line("18.10.26 12:00:01;RING;0;01701234567;089123456;SIP0;\r")
+    assert (event.kind, event.connection_id, event.fields) == ("RING", "0", ("01701234567", "089123456", "SIP0"))
+    assert parse_line("garbage") is None
+    assert parse_line("18.10.26 12:00:01;HELLO;0;") is None
+
+
+def test_monitor_delivers_events_and_reconnects():
+    server = _FakeCallMonitor(
+        [
+            ["18.10.26 12:00:01;RING;0;0170;089;SIP0;", "18.10.26 12:00:09;DISCONNECT;0;0;"],
+            ["18.10.26 12:05:00;CALL;1;10;089;0170;SIP0;"],
+        ]
+    )
+    events = []
+    monitor = CallMonitor("127.0.0.1", events.append, port=server.port, reconnect_min=0.05)
+    monitor.start()
+    try:
+        assert _wait_for(lambda: len(events) == 3)
+    finally:
+        monitor.stop()
+    assert [e.kind for e in events] == ["RING", "DISCONNECT", "CALL"]
+    assert server.connections == 2
+
+
+def test_trigger_reschedules_job():
+    svc = CacheService()
+    svc.register(CacheJob(name="calls", fetch=dict, interval_seconds=600))
+    job = svc._scheduler.get_job("calls")
+    svc._scheduler.modify_job("calls", next_run_time=job.next_run_time.replace(year=2099))
+    svc.start()
+    try:
+        assert svc.get("calls").checked_at is None
+        svc.trigger("calls")
+        assert _wait_for(lambda: svc.get("calls").checked_at is not None)
+    finally:
+        svc.shutdown()
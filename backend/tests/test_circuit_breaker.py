@@ -0,0 +1,37 @@
+"""Tests for the upstream circuit breaker."""
+
+from __future__ import annotations
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_threshold_and_probes_half_open():
+    now = [0.0]
+    breaker = CircuitBreaker("up", failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe
+
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == (CLOSED, 0)
+
+
+def test_failed_probe_doubles_the_wait():
+    now = [0.0]
+    breaker = CircuitBreaker("up", failure_threshold=1, reset_timeout=10, max_reset_timeout=15, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.snapshot() == {"state": OPEN, "failures": 2, "retry_in": 15.0}
+    now[0] = 24
+    assert not breaker.allow()
+    now[0] = 25
+    assert breaker.allow()
@@ -0,0 +1,41 @@
+"""Tests for pre-compressed variants and Accept-Encoding negotiation."""
+
+from __future__ import annotations
+
+import gzip
+
+import compression
+from compression import compress_variants, negotiate, variant_etag
+
+
+def test_small_body_not_compressed():
+    assert compress_variants(b"{}") == {}
+
+
+def test_gzip_variant_roundtrips():
+    body = b'{"calls": [' + b",".join(b'{"name": "Mama"}' for _ in range(100)) + b"]}"
+    variants = compress_variants(body)
+    assert gzip.decompress(variants["gzip"]) == body
+    assert all(len(v) < len(body) for v in variants.values())
+
+
+def test_negotiate_prefers_server_order_on_equal_q():
+    available = ["gzip", "br", "zstd"]
+    assert negotiate("gzip, deflate, br, zstd", available) == compression.ENCODINGS[0]
+
+
+def test_negotiate_respects_q_values():
+    assert negotiate("br;q=0.5, gzip;q=1.0", ["br", "gzip"]) == "gzip"
+    assert negotiate("gzip;q=0", ["gzip"]) is None
+    assert negotiate("*", ["gzip"]) == "gzip"
+
+
+def test_negotiate_identity_when_nothing_acceptable():
+    assert negotiate(None, ["gzip"]) is None
+    assert negotiate("deflate", ["gzip"]) is None
+    assert negotiate("gzip", []) is None
+
+
+def test_variant_etag():
+    assert variant_etag("abc", None) == "abc"
+    assert variant_etag("abc", "gzip") == "abc-gzip"
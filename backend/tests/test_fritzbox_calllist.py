@@ -2,15 +2,27 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from FritzBox.fritzbox_calllist import _safe_strip_sip, parse_calllist_xml
+from FritzBox import fritzbox_calllist
+from FritzBox.fritzbox_calllist import (
+    CallLog,
+    FritzBoxSession,
+    FritzBoxSessionError,
+    _parse_date,
+    _pbkdf2_challenge,
+    _safe_strip_sip,
+    parse_calllist_xml,
+)
 
 
 def _build_xml(entries: list[dict]) -> str:
     items = "".join(
         f"<Call>"
+        f"<Id>{e.get('id', '')}</Id>"
         f"<Type>{e.get('type', '1')}</Type>"
         f"<Date>{e['date']}</Date>"
         f"<Caller>{e.get('caller', '')}</Caller>"
@@ -74,3 +86,112 @@ def test_results_capped_at_50():
     today = datetime.now().strftime("%d.%m.%y %H:%M")
     xml = _build_xml([{"date": today} for _ in range(80)])
     assert len(parse_calllist_xml(xml, max_days=4)) == 50
+
+
+def test_fast_date_parser_matches_strptime():
+    tz = ZoneInfo("Europe/Berlin")
+    for value in ("01.02.24 07:05", "31.12.99 23:59", "29.02.68 00:00"):
+        assert _parse_date(value, tz) == datetime.strptime(value, "%d.%m.%y %H:%M").replace(tzinfo=tz)
+
+
+def test_parsing_stops_at_first_call_beyond_cutoff():
+    now = datetime.now()
+    dates = [now, now - timedelta(days=10), now - timedelta(minutes=5)]
+    xml = _build_xml([{"date": d.strftime("%d.%m.%y %H:%M"), "name": str(i)} for i, d in enumerate(dates)])
+    out = parse_calllist_xml(xml, max_days=4)
+    assert [c["name"] for c in out] == ["0"]
+
+
+def test_call_log_polls_only_newer_calls(monkeypatch):
+    now = datetime.now()
+    box = [
+        {"id": 2, "date": now.strftime("%d.%m.%y %H:%M"), "name": "B"},
+        {"id": 1, "date": now.strftime("%d.%m.%y %H:%M"), "name": "A"},
+    ]
+    requests_seen = []
+
+    def fetch(_user, _password, _ip, **params):
+        requests_seen.append(params)
+        since = params.get("id") or 0
+        return _build_xml([e for e in box if e["id"] > since]).encode()
+
+    monkeypatch.setattr(fritzbox_calllist, "_fetch_calllist", fetch)
+    log = CallLog(size=3)
+
+    assert [c["name"] for c in log.sync("u", "p", "ip")] == ["B", "A"]
+    assert "id" not in requests_seen[0]
+
+    assert [c["name"] for c in log.sync("u", "p", "ip")] == ["B", "A"]
+    assert requests_seen[1]["id"] == 2
+
+    box.insert(0, {"id": 3, "date": now.strftime("%d.%m.%y %H:%M"), "name": "C"})
+    box.insert(0, {"id": 4, "date": now.strftime("%d.%m.%y %H:%M"), "name": "D"})
+    assert [c["name"] for c in log.sync("u", "p", "ip")] == ["D", "C", "B"]
+    assert log.last_id == 4
+
+
+def test_call_log_full_resync_when_buffer_overruns(monkeypatch):
+    today = datetime.now().strftime("%d.%m.%y %H:%M")
+    box = [{"id": 1, "date": today}]
+    full_syncs = []
+
+    def fetch(_user, _password, _ip, **params):
+        if "id" not in params:
+            full_syncs.append(params)
+        since = params.get("id") or 0
+        return _build_xml([e for e in box if e["id"] > since]).encode()
+
+    monkeypatch.setattr(fritzbox_calllist, "_fetch_calllist", fetch)
+    log = CallLog(size=2)
+    log.sync("u", "p", "ip")
+    box[:0] = [{"id": 3, "date": today}, {"id": 2, "date": today}]
+    log.sync("u", "p", "ip")
+    assert len(full_syncs) == 2
+    assert log.last_id == 3
+
+
+def test_pbkdf2_challenge_matches_avm_example():
+    answer = _pbkdf2_challenge("2$10000$5A1711$2000$5A1722", "1example!")
+    assert answer == "5A1722$1798a1672bca7c6463d6b245f82b53703b0f50813401b03e4045a5861e689adb"
+
+
+def test_session_logs_in_once_for_concurrent_callers(monkeypatch):
+    logins = []
+
+    def get_sid(*_args):
+        logins.append(1)
+        time.sleep(0.05)
+        return f"sid{len(logins)}"
+
+    monkeypatch.setattr(fritzbox_calllist, "get_sid", get_sid)
+    session = FritzBoxSession()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(session.get("u", "p", "ip"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["sid1"] * 5
+    assert len(logins) == 1
+
+    session.invalidate("stale")  # someone else's old SID: keep ours
+    assert session.get("u", "p", "ip") == "sid1"
+    session.invalidate("sid1")
+    assert session.get("u", "p", "ip") == "sid2"
+
+
+def test_rejected_sid_is_renewed_and_retried_once(monkeypatch):
+    monkeypatch.setattr(fritzbox_calllist, "_fritz_session", FritzBoxSession())
+    sids = iter(["old", "new"])
+    monkeypatch.setattr(fritzbox_calllist, "get_sid", lambda *_args: next(sids))
+    seen = []
+
+    def get_calllist(_ip, sid, _params):
+        seen.append(sid)
+        if sid == "old":
+            raise FritzBoxSessionError("rejected")
+        return b"<root/>"
+
+    monkeypatch.setattr(fritzbox_calllist, "_get_calllist", get_calllist)
+    assert fritzbox_calllist._fetch_calllist("u", "p", "ip") == b"<root/>"
+    assert seen == ["old", "new"]
@@ -0,0 +1,44 @@
+"""Tests for JSON patch generation/application."""
+
+from __future__ import annotations
+
+import pytest
+
+from json_patch import JsonPatchError, apply_patch, make_patch
+
+
+def test_identical_documents_give_empty_patch():
+    assert make_patch({"a": [1, 2]}, {"a": [1, 2]}) == []
+
+
+def test_new_call_on_top_is_a_single_add():
+    old = {"2026-06-22": [{"name": "Mama"}, {"name": "Papa"}]}
+    new = {"2026-06-22": [{"name": "Oma"}, {"name": "Mama"}, {"name": "Papa"}]}
+    patch = make_patch(old, new)
+    assert patch == [{"op": "add", "path": "/2026-06-22/0", "value": {"name": "Oma"}}]
+    assert apply_patch(old, patch) == new
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        ({"a": 1, "b": 2}, {"b": 3, "c": 4}),
+        ([1, 2, 3, 4], [1, 4]),
+        ([1, 2], [5, 6, 7, 8]),
+        ({"x/y": {"~z": [1]}}, {"x/y": {"~z": [2]}}),
+        ({"a": 1}, [1, 2]),
+    ],
+)
+def test_roundtrip(old, new):
+    assert apply_patch(old, make_patch(old, new)) == new
+
+
+def test_apply_does_not_mutate_input():
+    doc = {"a": [1]}
+    apply_patch(doc, [{"op": "add", "path": "/a/1", "value": 2}])
+    assert doc == {"a": [1]}
+
+
+def test_apply_invalid_path_raises():
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": 1}, [{"op": "replace", "path": "/b", "value": 2}])
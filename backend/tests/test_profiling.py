@@ -0,0 +1,112 @@
+"""Tests for the opt-in profiler."""
+
+from __future__ import annotations
+
+import cProfile
+import pstats
+import sys
+import threading
+
+import pytest
+
+from profiling import Profiler
+
+
+def _work(n: int = 2000) -> int:
+    return sum(i * i for i in range(n))
+
+
+def test_disabled_profiler_is_a_no_op():
+    p = Profiler()
+    with p.capture("job", "events"):
+        _work()
+    assert p.bind(_work) is _work
+    assert p.begin("http", "/api/events") is None
+    assert p.records() == []
+
+
+def test_capture_keeps_last_n_per_name():
+    p = Profiler(keep=2)
+    p.configure(True)
+    for _ in range(3):
+        with p.capture("job", "events"):
+            _work()
+    with p.capture("job", "calls"):
+        _work()
+
+    records = p.records()
+    assert [(r["name"], r["id"]) for r in records] == [("events", 2), ("events", 3), ("calls", 4)]
+    assert p.get(1) is None
+
+
+def test_capture_includes_work_on_fetch_thread(tmp_path):
+    p = Profiler()
+    p.configure(True)
+    with p.capture("job", "calls"):
+        t = threading.Thread(target=p.bind(_work))
+        t.start()
+        t.join()
+
+    record = p.get(1)
+    assert any(func[2] == "_work" for func in record.stats)
+    dump = tmp_path / "calls.prof"
+    dump.write_bytes(record.to_pstats())
+    assert pstats.Stats(str(dump)).stats == record.stats
+
+
+def test_overlapping_captures_are_skipped():
+    p = Profiler()
+    p.configure(True)
+    with p.capture("job", "events"):
+        other = threading.Thread(target=lambda: p.end(p.begin("http", "/api/calls")))
+        other.start()
+        other.join()
+    with p.capture("http", "/api/calls"):
+        _work()
+    assert [r["name"] for r in p.records()] == ["events", "/api/calls"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="cProfile is per-thread before 3.12")
+def test_capture_steps_aside_for_another_profiling_tool():
+    p = Profiler()
+    p.configure(True)
+    external = cProfile.Profile()
+    external.enable()
+    try:
+        with p.capture("job", "calls"):
+            t = threading.Thread(target=p.bind(_work))
+            t.start()
+            t.join()
+    finally:
+        external.disable()
+    assert p.records() == []
+    with p.capture("job", "calls"):
+        _work()
+    assert len(p.records()) == 1
+
+
+def test_speedscope_export_references_valid_frames():
+    p = Profiler()
+    p.configure(True)
+    with p.capture("job", "weather"):
+        _work(20000)
+
+    doc = p.get(1).to_speedscope()
+    frames = doc["shared"]["frames"]
+    profile = doc["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"])
+    assert all(0 <= i < len(frames) for sample in profile["samples"] for i in sample)
+    assert any(f["name"] == "_work" for f in frames)
+
+
+def test_trace_memory_records_allocation_growth():
+    p = Profiler()
+    p.configure(True, trace_memory=True)
+    try:
+        with p.capture("job", "events"):
+            kept = [bytearray(1024) for _ in range(200)]
+    finally:
+        p.configure(False)
+    assert kept
+    assert p.get(1).allocations
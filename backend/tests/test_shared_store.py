@@ -0,0 +1,101 @@
+"""Tests for the multi-worker shared store and scheduler lease."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from cache_service import CacheJob, CacheService, RefreshForwardedError
+from shared_store import SharedStore
+
+
+def _worker(path, lease_seconds=15.0):
+    svc = CacheService()
+    svc.attach_store(SharedStore(path, lease_seconds=lease_seconds))
+    return svc
+
+
+def test_only_one_worker_holds_the_lease(tmp_path):
+    a = _worker(tmp_path / "shared.db")
+    b = _worker(tmp_path / "shared.db")
+    assert a.is_leader
+    assert not b.is_leader
+
+
+def test_follower_applies_leader_changes_and_notifies(tmp_path):
+    a = _worker(tmp_path / "shared.db")
+    b = _worker(tmp_path / "shared.db")
+    job = CacheJob(name="calls", fetch=lambda: {"v": 1}, interval_seconds=60)
+    a.register(job)
+    b.register(job)
+    q = b.subscribe()
+
+    a._run_job(job)
+    b._sync()
+
+    assert b.get("calls").etag == a.get("calls").etag
+    assert b.get("calls").body == a.get("calls").body
+    assert q.get(timeout=1) == {"name": "calls", "etag": a.get("calls").etag}
+
+
+def test_new_worker_starts_with_shared_entries(tmp_path):
+    a = _worker(tmp_path / "shared.db")
+    job = CacheJob(name="weather", fetch=lambda: {"t": 20}, interval_seconds=60)
+    a.register(job)
+    a._run_job(job)
+
+    late = _worker(tmp_path / "shared.db")
+    assert late.get("weather").etag == a.get("weather").etag
+
+
+def test_follower_takes_over_expired_lease(tmp_path, monkeypatch):
+    a = _worker(tmp_path / "shared.db", lease_seconds=5)
+    b = _worker(tmp_path / "shared.db", lease_seconds=5)
+    assert not b.is_leader
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 10)
+    b._sync()
+    assert b.is_leader
+    a._sync()
+    assert not a.is_leader
+
+
+def test_leadership_callbacks_follow_the_lease(tmp_path, monkeypatch):
+    a = _worker(tmp_path / "shared.db", lease_seconds=5)
+    b = _worker(tmp_path / "shared.db", lease_seconds=5)
+    seen_a: list[bool] = []
+    seen_b: list[bool] = []
+    a.on_leadership_change(seen_a.append)
+    b.on_leadership_change(seen_b.append)
+    assert (seen_a, seen_b) == ([True], [False])
+
+    b._sync()
+    assert seen_b == [False]
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 10)
+    b._sync()
+    a._sync()
+    assert seen_a == [True, False]
+    assert seen_b == [False, True]
+
+
+def test_follower_forwards_refresh_to_leader(tmp_path):
+    a = _worker(tmp_path / "shared.db")
+    b = _worker(tmp_path / "shared.db")
+    fetched = []
+    job = CacheJob(name="calls", fetch=lambda: fetched.append(1) or {"v": len(fetched)}, interval_seconds=60)
+    a.register(job)
+    b.register(job)
+
+    with pytest.raises(RefreshForwardedError):
+        b.refresh("calls")
+    assert fetched == []  # the follower never fetched upstream
+
+    a._sync()
+    a._in_flight["calls"].result(timeout=5)
+    assert fetched == [1]
+    b._sync()
+    assert b.get("calls").etag == a.get("calls").etag
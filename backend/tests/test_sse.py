@@ -0,0 +1,91 @@
+"""Tests for the shared SSE broadcaster."""
+
+from __future__ import annotations
+
+import json
+
+from cache_service import CacheJob, CacheService
+from sse import Broadcaster
+
+
+def _data(frame: str) -> dict:
+    return json.loads(frame.split("data: ", 1)[1])
+
+
+def test_new_client_gets_current_versions():
+    svc = CacheService()
+    job = CacheJob(name="calls", fetch=lambda: {"v": 1}, interval_seconds=60)
+    svc.register(job)
+    svc._run_job(job)
+
+    b = Broadcaster()
+    svc.subscribe(b)
+    gen = b.stream(heartbeat=0.01)
+    assert next(gen) == ": connected\n\n"
+    assert _data(next(gen)) == {"name": "calls", "etag": svc.get("calls").etag}
+    gen.close()
+
+
+def test_publish_reaches_every_client_once():
+    svc = CacheService()
+    b = Broadcaster()
+    svc.subscribe(b)
+    svc.subscribe(b)  # idempotent
+    clients = [b.stream(heartbeat=0.01) for _ in range(3)]
+    for gen in clients:
+        next(gen)
+    assert b.client_count == 3
+
+    svc._publish("events", "abc")
+    for gen in clients:
+        assert _data(next(gen)) == {"name": "events", "etag": "abc"}
+        assert next(gen).startswith(": ping")
+        gen.close()
+    assert b.client_count == 0
+
+
+def test_lagging_client_resyncs_to_latest():
+    b = Broadcaster(history=2)
+    gen = b.stream(heartbeat=0.01)
+    next(gen)
+    for i in range(5):
+        b.put_nowait({"name": "weather", "etag": str(i)})
+    b.put_nowait({"name": "calls", "etag": "c"})
+    frames = [_data(next(gen)) for _ in range(2)]
+    assert {"name": "weather", "etag": "4"} in frames
+    assert {"name": "calls", "etag": "c"} in frames
+    gen.close()
+
+
+def test_inline_and_patch_modes_carry_payload():
+    from json_patch import apply_patch
+
+    svc = CacheService()
+    state = {"calls": [{"name": f"Anruf {i}"} for i in range(20)]}
+    job = CacheJob(name="calls", fetch=lambda: state, interval_seconds=60)
+    svc.register(job)
+    svc._run_job(job)
+    first = json.loads(svc.get("calls").body)
+    first_etag = svc.get("calls").etag
+
+    b = Broadcaster(lookup=svc.get)
+    svc.subscribe(b)
+    inline, patched = b.stream(heartbeat=0.01, mode="inline"), b.stream(heartbeat=0.01, mode="patch")
+    for gen in (inline, patched):
+        next(gen)
+        assert _data(next(gen))["data"] == first  # initial snapshot is always full
+
+    state = {"calls": [{"name": "Neu"}, *state["calls"]]}
+    svc._run_job(job)
+    entry = svc.get("calls")
+
+    msg = _data(next(inline))
+    assert msg["etag"] == entry.etag
+    assert msg["data"] == state
+
+    msg = _data(next(patched))
+    assert "data" not in msg
+    assert msg["base"] == first_etag
+    assert apply_patch(first, msg["patch"]) == state
+    inline.close()
+    patched.close()
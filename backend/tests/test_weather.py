@@ -2,11 +2,31 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from config import settings
+import pytest
+
+from config import WeatherLocation, settings
 from Weather import weather
+from Weather.budget import RequestBudget
+
+
+@pytest.fixture(autouse=True)
+def _reset_raw_cache():
+    weather._raw_cache.clear()
+    weather._in_flight.clear()
+    yield
+    weather._raw_cache.clear()
+    weather._in_flight.clear()
+
+
+def _returning(payload):
+    async def fetch(**_):
+        return payload
+
+    return fetch
 
 
 def _unix(dt: datetime) -> int:
@@ -37,9 +57,9 @@ def test_hourly_forecast_groups_and_filters(monkeypatch):
             },
         ]
     }
-    monkeypatch.setattr(weather, "_fetch", lambda **_: payload)
+    monkeypatch.setattr(weather, "_fetch_async", _returning(payload))
 
-    result = weather.get_hourly_forecast()
+    result = weather.hourly_from(asyncio.run(weather.get_onecall_async()))
     all_entries = [item for entries in result.values() for item in entries]
     assert len(all_entries) == 2
     first = all_entries[0]
@@ -62,9 +82,9 @@ def test_daily_forecast_limited_to_four_days(monkeypatch):
             for i in range(7)
         ]
     }
-    monkeypatch.setattr(weather, "_fetch", lambda **_: payload)
+    monkeypatch.setattr(weather, "_fetch_async", _returning(payload))
 
-    result = weather.get_daily_forecast()
+    result = weather.daily_from(asyncio.run(weather.get_onecall_async()))
     assert len(result) == 4
     assert result[0]["beschreibung"] == "Sonnig"
     assert result[0]["temp_min"] == 5
@@ -73,5 +93,106 @@ def test_daily_forecast_limited_to_four_days(monkeypatch):
 
 
 def test_hourly_forecast_handles_empty_payload(monkeypatch):
-    monkeypatch.setattr(weather, "_fetch", lambda **_: {})
-    assert weather.get_hourly_forecast() == {}
+    monkeypatch.setattr(weather, "_fetch_async", _returning({}))
+    assert weather.hourly_from(asyncio.run(weather.get_onecall_async())) == {}
+
+
+def test_weather_views_share_one_upstream_request(monkeypatch):
+    calls = []
+
+    async def fetch(**kwargs):
+        calls.append(kwargs)
+        return {"hourly": [], "daily": []}
+
+    monkeypatch.setattr(weather, "_fetch_async", fetch)
+
+    assert asyncio.run(weather.get_weather_async()) == {"weekly_weather": {}, "daily_weather": []}
+    asyncio.run(weather.get_onecall_async())
+    assert len(calls) == 1
+
+    asyncio.run(weather.get_onecall_async(max_age=0))
+    assert len(calls) == 2
+
+
+def test_get_weather_fetches_every_location(monkeypatch):
+    locations = [
+        WeatherLocation(name="zuhause", lat=48.0, lon=11.0),
+        WeatherLocation(name="berg", lat=47.0, lon=10.0),
+        WeatherLocation(name="kaputt", lat=0.0, lon=0.0),
+    ]
+    monkeypatch.setattr(settings, "weather_locations", locations)
+
+    async def fetch(**kwargs):
+        if kwargs["lat"] == 0.0:
+            raise ConnectionError("down")
+        return {"hourly": [], "daily": []}
+
+    monkeypatch.setattr(weather, "_fetch_async", fetch)
+
+    payload = asyncio.run(weather.get_weather_async())
+    assert payload["daily_weather"] == []
+    assert list(payload["locations"]) == ["berg"]
+
+
+def test_request_budget_refuses_when_empty():
+    now = [0.0]
+    budget = RequestBudget(per_day=1000, per_minute=2, clock=lambda: now[0])
+    assert budget.try_acquire()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    now[0] += 30  # half a minute refills one token
+    assert budget.try_acquire()
+    assert budget.remaining()["day"] == 997
+
+
+def test_refresh_interval_stretches_to_daily_budget(monkeypatch):
+    monkeypatch.setattr(settings, "weather_daily_budget", 100)
+    assert weather.refresh_interval(600) == 960
+    monkeypatch.setattr(settings, "weather_daily_budget", 1000)
+    assert weather.refresh_interval(600) == 600
+
+
+def test_get_weather_async_gathers_locations(monkeypatch):
+    locations = [WeatherLocation(name="zuhause", lat=48.0, lon=11.0), WeatherLocation(name="kaputt", lat=0.0, lon=0.0)]
+    monkeypatch.setattr(settings, "weather_locations", locations)
+
+    async def fetch(**kwargs):
+        if kwargs["lat"] == 0.0:
+            raise ConnectionError("down")
+        return {"hourly": [], "daily": []}
+
+    monkeypatch.setattr(weather, "_fetch_async", fetch)
+
+    payload = asyncio.run(weather.get_weather_async())
+    assert payload == {"weekly_weather": {}, "daily_weather": [], "locations": {}}
+    assert asyncio.run(weather.get_onecall_async(locations[0])) == {"hourly": [], "daily": []}  # shared raw cache
+
+
+def test_concurrent_callers_share_one_in_flight_fetch(monkeypatch):
+    calls = []
+
+    async def fetch(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        return {"hourly": [], "daily": []}
+
+    monkeypatch.setattr(weather, "_fetch_async", fetch)
+
+    async def both():
+        return await asyncio.gather(weather.get_onecall_async(), weather.get_onecall_async())
+
+    first, second = asyncio.run(both())
+    assert first is second
+    assert len(calls) == 1
+
+
+def test_each_loop_gets_its_own_client():
+    async def client():
+        return weather._client()
+
+    async def twice():
+        return weather._client() is weather._client()
+
+    assert asyncio.run(twice())
+    first, second = asyncio.run(client()), asyncio.run(client())
+    assert first is not second
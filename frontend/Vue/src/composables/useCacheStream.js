@@ -1,7 +1,12 @@
 /**
- * Composable that listens to the backend SSE stream and invalidates
+ * Composable that listens to the backend SSE stream and updates the
  * Vue Query caches when the server announces an update.
  *
+ * The stream runs in `patch` mode: events carry either the full body
+ * (`data`) or a JSON patch against the `base` etag we already hold, so no
+ * follow-up GET is needed. Anything that cannot be applied falls back to
+ * invalidating the query.
+ *
  * On connection loss it marks the connection store offline and keeps
  * retrying via EventSource reconnect (every RECONNECT_DELAY_MS) until
  * the stream is back.
@@ -9,8 +14,10 @@
 import { onBeforeUnmount, onMounted } from 'vue'
 import { useQueryClient } from '@tanstack/vue-query'
 import { useConnectionStore } from '../stores/connection'
+import { primeEtagCache } from '../utils/api'
+import { applyPatch } from '../utils/jsonPatch'
 
-const STREAM_URL = '/api/stream'
+const STREAM_URL = '/api/stream?mode=patch'
 const RECONNECT_DELAY_MS = 5000
 
 export function useCacheStream() {
@@ -21,6 +28,19 @@ export function useCacheStream() {
   let reconnectTimer = null
   let stopped = false
 
+  function applyUpdate({ name, etag, data, base, patch }) {
+    let body = data
+    if (body === undefined && patch) {
+      const current = queryClient.getQueryData([name])
+      if (current?.etag !== base) throw new Error('patch base mismatch')
+      body = applyPatch(current, patch)
+    }
+    if (body === undefined) throw new Error('notification only')
+    if (queryClient.getQueryData([name])?.etag === etag) return
+    queryClient.setQueryData([name], body)
+    primeEtagCache(`/api/${name}`, etag, body)
+  }
+
   function connect() {
     if (typeof EventSource === 'undefined') return
     source = new EventSource(STREAM_URL)
@@ -30,11 +50,17 @@ export function useCacheStream() {
     }
 
     source.addEventListener('cache-updated', (ev) => {
+      let msg
+      try {
+        msg = JSON.parse(ev.data)
+      } catch {
+        return // ignore malformed
+      }
+      if (!msg.name) return
       try {
-        const { name } = JSON.parse(ev.data)
-        if (name) queryClient.invalidateQueries({ queryKey: [name] })
+        applyUpdate(msg)
       } catch {
-        // ignore malformed
+        queryClient.invalidateQueries({ queryKey: [msg.name] })
       }
     })
 
@@ -4,7 +4,12 @@
  * Uses fetch + browser ETag handling (manual to allow Vue Query integration).
  * The browser would normally cache 304 responses transparently, but with our
  * Vue Query layer we want explicit access to the previous cached body.
+ *
+ * When a previous body is known the request carries `?since=<etag>`; the
+ * backend then answers with a small JSON patch (application/json-patch+json)
+ * as long as that version is still in its history.
  */
+import { applyPatch } from './jsonPatch'
 
 const _etagMap = new Map()
 const _bodyMap = new Map()
@@ -17,8 +22,10 @@ export async function fetchJson(url, { signal } = {}) {
   const headers = {}
   const etag = _etagMap.get(url)
   if (etag) headers['If-None-Match'] = etag
+  const previous = _bodyMap.get(url)
+  const target = etag && previous !== undefined ? `${url}?since=${encodeURIComponent(etag)}` : url
 
-  const res = await fetch(url, { headers, cache: 'no-store', signal })
+  const res = await fetch(target, { headers, cache: 'no-store', signal })
 
   if (res.status === 304) {
     return _bodyMap.get(url)
@@ -30,11 +37,21 @@ export async function fetchJson(url, { signal } = {}) {
   const newEtag = res.headers.get('ETag')
   if (newEtag) _etagMap.set(url, newEtag)
 
-  const body = await res.json()
+  const isPatch = res.headers.get('Content-Type')?.startsWith('application/json-patch+json')
+  const body = isPatch ? applyPatch(previous, await res.json()) : await res.json()
   _bodyMap.set(url, body)
   return body
 }
 
+/**
+ * Seed the ETag cache with a body that arrived via the SSE stream, so the
+ * next poll for `url` is answered with 304 instead of the full payload.
+ */
+export function primeEtagCache(url, etag, body) {
+  _etagMap.set(url, etag)
+  _bodyMap.set(url, body)
+}
+
 export function clearEtagCache() {
   _etagMap.clear()
   _bodyMap.clear()
@@ -0,0 +1,42 @@
+/**
+ * Minimal RFC 6902 JSON Patch applier for the SSE `patch` stream mode.
+ *
+ * Supports the operations the backend emits (add, remove, replace).
+ * Returns a new document; the input is left untouched.
+ */
+
+function unescapeToken(token) {
+  return token.replace(/~1/g, '/').replace(/~0/g, '~')
+}
+
+export function applyPatch(doc, patch) {
+  let result = structuredClone(doc)
+  for (const { op, path, value } of patch) {
+    if (path === '') {
+      if (op === 'remove') throw new Error('cannot remove the document root')
+      result = structuredClone(value)
+      continue
+    }
+    const tokens = path.split('/').slice(1).map(unescapeToken)
+    const last = tokens.pop()
+    let target = result
+    for (const token of tokens) {
+      target = Array.isArray(target) ? target[Number(token)] : target[token]
+      if (target === undefined) throw new Error(`path not found: ${path}`)
+    }
+    if (Array.isArray(target)) {
+      const index = last === '-' ? target.length : Number(last)
+      if (op === 'add') target.splice(index, 0, value)
+      else if (op === 'remove') target.splice(index, 1)
+      else if (op === 'replace') target[index] = value
+      else throw new Error(`unsupported op ${op}`)
+    } else if (op === 'add' || op === 'replace') {
+      target[last] = value
+    } else if (op === 'remove') {
+      delete target[last]
+    } else {
+      throw new Error(`unsupported op ${op}`)
+    }
+  }
+  return result
+}
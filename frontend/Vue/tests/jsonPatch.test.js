@@ -0,0 +1,23 @@
+import { describe, it, expect } from 'vitest'
+import { applyPatch } from '../src/utils/jsonPatch.js'
+
+describe('applyPatch', () => {
+  it('inserts a new call on top', () => {
+    const doc = { calls: { '2026-06-22': [{ name: 'Mama' }] }, etag: 'a' }
+    const out = applyPatch(doc, [
+      { op: 'add', path: '/calls/2026-06-22/0', value: { name: 'Oma' } },
+      { op: 'replace', path: '/etag', value: 'b' },
+    ])
+    expect(out).toEqual({ calls: { '2026-06-22': [{ name: 'Oma' }, { name: 'Mama' }] }, etag: 'b' })
+    expect(doc.etag).toBe('a')
+  })
+
+  it('removes keys and unescapes pointer tokens', () => {
+    const out = applyPatch({ 'a/b': 1, c: 2 }, [{ op: 'remove', path: '/a~1b' }])
+    expect(out).toEqual({ c: 2 })
+  })
+
+  it('throws on missing path', () => {
+    expect(() => applyPatch({}, [{ op: 'add', path: '/x/y', value: 1 }])).toThrow()
+  })
+})